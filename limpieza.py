@@ -28,38 +28,106 @@ Funcionalidades:
 - Manejo de errores con registro de archivos problemáticos
 - Soporte para sudo en conexiones SSH
 - Una sola conexión por servidor para múltiples rutas
+- Procesamiento concurrente de las distintas conexiones
 
 Uso:
-    python limpieza.py config.json [credenciales.json]
+    python limpieza.py [--verbose] config.json [credenciales.json]
 
 Nota: Para conexiones SSH/SFTP se requiere la librería paramiko.
 """
 
 import os
+import posixpath
 import sys
 import time
 import datetime
+import calendar
 import logging
-import ftplib
+import logging.handlers
+import importlib.util
 import fnmatch
+import re
 import json
+import shlex
+import stat
+import atexit
+import contextlib
+import functools
+import threading
+import queue
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from urllib.parse import urlparse
 
-PARAMIKO_DISPONIBLE = False
+# paramiko se importa al procesar la primera conexión SSH/SFTP (cargar_paramiko);
+# una ejecución sólo con rutas locales no paga su coste de arranque
+PARAMIKO_DISPONIBLE = importlib.util.find_spec("paramiko") is not None
+paramiko = None
+
+ORJSON_DISPONIBLE = False
 try:
-    import paramiko
-    PARAMIKO_DISPONIBLE = True
+    import orjson
+    ORJSON_DISPONIBLE = True
 except ImportError:
     pass
 
-def configurar_logging():
+log = logging.getLogger(__name__)
+
+# Sistemas de archivos de red en los que el borrado local se hace con varios hilos
+SISTEMAS_ARCHIVOS_RED = frozenset({
+    'nfs', 'nfs4', 'cifs', 'smb3', 'smbfs', 'fuse.sshfs', '9p', 'afs', 'ceph', 'glusterfs',
+})
+HILOS_BORRADO_LOCAL = 16
+# Archivos de un directorio a partir de los que se comprueban y eliminan en
+# orden de inodo (como fts en coreutils): en ext4/xfs el stat y el unlink
+# recorren la tabla de inodos en secuencia en lugar de saltar por el disco
+UMBRAL_ORDEN_INODO = 10000
+
+# Registros que se acumulan en memoria antes de escribirlos al archivo de log
+REGISTROS_BUFFER_LOG = 1024
+# Rutas eliminadas que se agrupan en un mismo registro DEBUG
+LOTE_LOG_ELIMINADOS = 1000
+
+# Conexiones procesadas a la vez si la configuración no fija max_conexiones_paralelas
+MAX_CONEXIONES_PARALELAS = 32
+# Rutas de una misma conexión que se procesan a la vez
+MAX_RUTAS_PARALELAS = 8
+# Pila de cada hilo de trabajo (la de Windows por defecto)
+TAMANO_PILA_HILOS = 1024 * 1024
+
+# Campos que debe tener toda conexión remota tras combinarla con sus credenciales
+CAMPOS_REQUERIDOS = ('tipo', 'host', 'usuario', 'contrasena')
+
+# Conexiones SSH compartidas entre alias del mismo servidor, por (host, puerto, usuario)
+_conexiones_ssh = {}
+_bloqueos_ssh = {}
+_bloqueo_pool_ssh = threading.Lock()
+# Límite de canales de cada conexión compartida, con la misma clave (_CanalesSSH)
+_canales_ssh = {}
+# Canales abiertos a la vez sobre una conexión SSH compartida, salvo que la
+# conexión fije max_canales_ssh: por debajo del MaxSessions por defecto de sshd (10)
+MAX_CANALES_SSH = 8
+# Segundos entre keepalives de las conexiones compartidas: mantienen viva la
+# sesión en cortafuegos con timeout de inactividad mientras se procesan otros alias
+KEEPALIVE_SSH = 30
+# Bytes de la salida de un comando SSH que se leen de una vez cuando se
+# procesa a medida que llega en lugar de acumularla entera
+BLOQUE_SALIDA_SSH = 65536
+
+# Archivos JSON ya parseados, por ruta absoluta: ((inodo, mtime_ns, tamaño), objeto)
+_cache_json = {}
+
+def configurar_logging(verbose=False):
     """
     Configura el sistema de logging para el script.
     
     Crea el directorio 'logs' si no existe y configura un archivo de log
     con timestamp en el nombre. El log incluye timestamp, nivel y mensaje.
     
+    Args:
+        verbose (bool): Si es True se registra en nivel DEBUG, incluyendo
+            cada archivo eliminado
+    
     Returns:
         str: Ruta del archivo de log creado
     """
@@ -71,18 +139,93 @@ def configurar_logging():
     log_filename = f"limpieza_{timestamp}.log"
     log_path = logs_dir / log_filename
     
+    formato = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s',
+                                datefmt='%Y-%m-%d %H:%M:%S')
+    
+    # Los registros se escriben al archivo en bloques de REGISTROS_BUFFER_LOG;
+    # un ERROR vuelca el bloque en el acto y logging.shutdown el resto al salir
+    manejador_archivo = logging.handlers.MemoryHandler(
+        REGISTROS_BUFFER_LOG,
+        flushLevel=logging.ERROR,
+        target=logging.FileHandler(log_path, delay=True)
+    )
+    manejador_archivo.target.setFormatter(formato)
+    manejador_consola = logging.StreamHandler(sys.stdout)
+    manejador_consola.setFormatter(formato)
+    
+    # Los hilos de borrado solo encolan el registro; la escritura a archivo y
+    # consola la hace el hilo del QueueListener, fuera del bucle de borrado
+    cola = queue.SimpleQueue()
+    oyente = logging.handlers.QueueListener(cola, manejador_archivo, manejador_consola)
+    oyente.start()
+    # Se registra después de importar logging, así que atexit lo ejecuta antes
+    # que logging.shutdown y los registros pendientes llegan al MemoryHandler
+    atexit.register(oyente.stop)
+    
+    # El QueueHandler solo resuelve el mensaje; el formato final lo aplican
+    # los manejadores del oyente
     logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S',
-        handlers=[
-            logging.FileHandler(log_path),
-            logging.StreamHandler(sys.stdout)
-        ]
+        level=logging.DEBUG if verbose else logging.INFO,
+        format='%(message)s',
+        handlers=[logging.handlers.QueueHandler(cola)]
     )
     
+    if verbose:
+        # Evitar que la traza interna de paramiko inunde el log
+        logging.getLogger("paramiko").setLevel(logging.INFO)
+    
     return str(log_path)
 
+def parsear_json(contenido):
+    """
+    Parsea un documento JSON, usando orjson si está instalado.
+    
+    Args:
+        contenido (str o bytes): Texto JSON completo (bytes en UTF-8)
+        
+    Returns:
+        Objeto Python resultante
+        
+    Raises:
+        json.JSONDecodeError: Si el contenido no es JSON válido
+            (orjson.JSONDecodeError hereda de ella)
+    """
+    if ORJSON_DISPONIBLE:
+        return orjson.loads(contenido)
+    return json.loads(contenido)
+
+def leer_json(ruta):
+    """
+    Lee y parsea un archivo JSON, reutilizando el resultado si no ha cambiado.
+    
+    El archivo se lee de una vez en binario (orjson y json aceptan bytes
+    UTF-8) y el objeto parseado se guarda junto al inodo, la fecha y el
+    tamaño del archivo; una nueva carga del mismo archivo sin cambios no lo
+    vuelve a leer ni parsear. El inodo detecta también los archivos
+    sustituidos por otro con la misma fecha y tamaño (rsync -t, cp -p o un
+    renombrado atómico). El objeto devuelto es compartido y no debe modificarse.
+    
+    Args:
+        ruta (str): Ruta al archivo JSON
+        
+    Returns:
+        Objeto Python resultante
+    """
+    with open(ruta, 'rb') as f:
+        estado = os.fstat(f.fileno())
+        version = (estado.st_ino, estado.st_mtime_ns, estado.st_size)
+        # Ruta absoluta: una ruta relativa no apunta a otro archivo tras un chdir
+        clave = os.path.abspath(ruta)
+        
+        cacheado = _cache_json.get(clave)
+        if cacheado is not None and cacheado[0] == version:
+            return cacheado[1]
+        
+        objeto = parsear_json(f.read())
+    
+    _cache_json[clave] = (version, objeto)
+    return objeto
+
 def cargar_configuracion(config_file):
     """
     Carga la configuración desde un archivo JSON.
@@ -94,8 +237,7 @@ def cargar_configuracion(config_file):
         dict: Configuración cargada
     """
     try:
-        with open(config_file, 'r', encoding='utf-8') as f:
-            config = json.load(f)
+        config = leer_json(config_file)
         
         logging.info(f"Configuración cargada desde: {config_file}")
         return config
@@ -136,8 +278,7 @@ def cargar_credenciales(credenciales_file=None):
             return {}
     
     try:
-        with open(credenciales_file, 'r', encoding='utf-8') as f:
-            credenciales = json.load(f)
+        credenciales = leer_json(credenciales_file)
         
         logging.info(f"Credenciales cargadas desde: {credenciales_file}")
         return credenciales
@@ -172,26 +313,88 @@ def combinar_configuracion(config, credenciales):
     
     for alias, conexion_config in conexiones_config.items():
         if conexion_config.get('tipo') == 'local':
-            conexiones_combinadas[alias] = conexion_config
-            conexiones_combinadas[alias]['alias'] = alias
+            conexiones_combinadas[alias] = {**conexion_config, 'alias': alias}
             continue
             
         if alias not in credenciales:
             logging.error(f"No se encontraron credenciales para el alias: {alias}")
             continue
             
-        conexion_combinada = {**conexion_config, **credenciales[alias]}
-        conexion_combinada['alias'] = alias
+        conexion_combinada = {**conexion_config, **credenciales[alias], 'alias': alias}
         conexiones_combinadas[alias] = conexion_combinada
         
-        campos_requeridos = ['tipo', 'host', 'usuario', 'contrasena']
-        for campo in campos_requeridos:
-            if campo not in conexion_combinada:
-                logging.error(f"Falta campo requerido '{campo}' en conexión: {alias}")
-                break
+        faltan = [campo for campo in CAMPOS_REQUERIDOS if campo not in conexion_combinada]
+        if faltan:
+            logging.error(f"Faltan campos requeridos {faltan} en conexión: {alias}")
     
     return conexiones_combinadas
 
+def descartar_rutas_duplicadas(conexiones):
+    """
+    Quita las rutas que otra entrada de la configuración ya limpia.
+    
+    Dos rutas se consideran la misma si coinciden el tipo de conexión, el
+    servidor, el usuario, el uso de sudo, la ruta normalizada y la máscara.
+    De cada grupo se conserva la de menos días, que elimina todo lo que
+    eliminarían las demás. Las conexiones que se quedan sin rutas se omiten.
+    
+    Args:
+        conexiones (dict): Conexiones combinadas por alias
+        
+    Returns:
+        dict: Conexiones sin las rutas duplicadas
+    """
+    # Por clave de ruta: (días, alias, índice) de la que se conserva
+    conservadas = {}
+    claves = {}
+    
+    for alias, conexion in conexiones.items():
+        rutas = conexion.get('rutas')
+        if not isinstance(rutas, list):
+            continue
+        tipo = conexion.get('tipo')
+        
+        for indice, ruta_config in enumerate(rutas):
+            ruta = ruta_config.get('ruta') if isinstance(ruta_config, dict) else None
+            dias = ruta_config.get('dias') if isinstance(ruta_config, dict) else None
+            if not isinstance(ruta, str) or not isinstance(dias, (int, float)) or isinstance(dias, bool):
+                continue
+            
+            if tipo == 'local':
+                clave = (tipo, None, None, None, False, os.path.abspath(ruta), ruta_config.get('mascara'))
+            else:
+                clave = (tipo, conexion.get('host'), conexion.get('puerto'), conexion.get('usuario'),
+                         bool(conexion.get('necesita_sudo', False)), posixpath.normpath(ruta), ruta_config.get('mascara'))
+            claves[(alias, indice)] = clave
+            
+            if clave not in conservadas or dias < conservadas[clave][0]:
+                conservadas[clave] = (dias, alias, indice)
+    
+    resultado = {}
+    for alias, conexion in conexiones.items():
+        rutas = conexion.get('rutas')
+        if not isinstance(rutas, list):
+            resultado[alias] = conexion
+            continue
+        
+        rutas_conservadas = []
+        for indice, ruta_config in enumerate(rutas):
+            clave = claves.get((alias, indice))
+            if clave is None or conservadas[clave][1:] == (alias, indice):
+                rutas_conservadas.append(ruta_config)
+                continue
+            dias, alias_conservado, _ = conservadas[clave]
+            logging.info(f"Ruta duplicada omitida en {alias}: {ruta_config['ruta']} ({ruta_config['dias']} días), ya la limpia {alias_conservado} con {dias} días")
+        
+        if rutas_conservadas:
+            resultado[alias] = {**conexion, 'rutas': rutas_conservadas}
+        elif rutas:
+            logging.info(f"Conexión {alias} omitida: todas sus rutas las limpian otras conexiones")
+        else:
+            resultado[alias] = conexion
+    
+    return resultado
+
 def verificar_dependencias(conexiones):
     """
     Verifica que las dependencias necesarias estén disponibles según la configuración.
@@ -215,7 +418,126 @@ def verificar_dependencias(conexiones):
     
     return True
 
-def eliminar_archivos_locales(ruta_base, dias, mascara=None):
+def compilar_mascara(mascara):
+    """
+    Compila una máscara fnmatch una sola vez para reutilizarla en cada archivo.
+    
+    Aplica las mismas reglas que fnmatch.fnmatch (sin distinguir mayúsculas
+    en Windows) pero evita traducir y buscar el patrón en caché por archivo.
+    
+    Args:
+        mascara (str): Patrón fnmatch o None
+        
+    Returns:
+        callable: Función que devuelve un objeto match si el nombre coincide,
+            o None si no hay máscara
+    """
+    if not mascara:
+        return None
+    
+    opciones = re.IGNORECASE if os.name == 'nt' else 0
+    return re.compile(fnmatch.translate(mascara), opciones).match
+
+def es_sistema_archivos_red(ruta):
+    """
+    Indica si una ruta local está en un sistema de archivos de red.
+    
+    En Windows se consideran de red las rutas UNC; en Linux se busca en
+    /proc/mounts el punto de montaje más largo que contiene la ruta. Si no
+    se puede determinar se asume que es un disco local.
+    
+    Args:
+        ruta (str): Ruta local
+        
+    Returns:
+        bool: True si la ruta está en NFS, CIFS/SMB u otro sistema de red
+    """
+    ruta = os.path.realpath(ruta)
+    
+    if os.name == 'nt':
+        return os.path.splitdrive(ruta)[0].startswith('\\\\')
+    
+    try:
+        with open('/proc/mounts', encoding='utf-8') as f:
+            montajes = [linea.split()[:3] for linea in f]
+    except OSError:
+        return False
+    
+    tipo_ruta = None
+    longitud = -1
+    for montaje in montajes:
+        if len(montaje) < 3:
+            continue
+        # /proc/mounts escapa los espacios del punto de montaje como \040
+        punto = montaje[1].replace('\\040', ' ')
+        dentro = ruta == punto or ruta.startswith(punto.rstrip('/') + '/')
+        if dentro and len(punto) > longitud:
+            tipo_ruta = montaje[2]
+            longitud = len(punto)
+    
+    return tipo_ruta in SISTEMAS_ARCHIVOS_RED
+
+def _escanear_directorio(directorio):
+    """
+    Lista un directorio local devolviendo el error en lugar de lanzarlo.
+    
+    Returns:
+        tuple: (entradas, error), con entradas None si no se pudo listar
+    """
+    try:
+        with os.scandir(directorio) as iterador:
+            return list(iterador), None
+    except OSError as e:
+        return None, e
+
+def _eliminar_si_caducado(entrada, limite_tiempo):
+    """
+    Elimina un archivo local si se modificó antes de limite_tiempo.
+    
+    Devuelve el resultado en lugar de lanzar errores para poder repartir las
+    llamadas entre varios hilos.
+    
+    Returns:
+        tuple: (resultado, error), con resultado 'reciente', 'eliminado',
+            'acceso' (falló el stat), 'enlace' (enlace simbólico roto) o
+            'borrado' (falló el unlink)
+    """
+    try:
+        # El stat queda cacheado en el DirEntry; los archivos recientes
+        # se descartan aquí sin más llamadas al sistema
+        if entrada.stat().st_mtime >= limite_tiempo:
+            return 'reciente', None
+    except FileNotFoundError as e:
+        # Un enlace roto da el mismo error que un archivo eliminado entretanto:
+        # se distinguen comprobando si el propio enlace sigue existiendo
+        if entrada.is_symlink() and os.path.lexists(entrada.path):
+            return 'enlace', e
+        return 'acceso', e
+    except OSError as e:
+        return 'acceso', e
+    
+    try:
+        os.unlink(entrada.path)
+    except OSError as e:
+        return 'borrado', e
+    return 'eliminado', None
+
+def registrar_eliminados(origen, rutas):
+    """
+    Registra en nivel DEBUG las rutas eliminadas, agrupadas en un registro
+    por cada LOTE_LOG_ELIMINADOS rutas en lugar de uno por archivo.
+    
+    Args:
+        origen (str): Tipo de conexión para el mensaje (local, SSH, SFTP, FTP)
+        rutas (list): Rutas eliminadas
+    """
+    if not rutas or not log.isEnabledFor(logging.DEBUG):
+        return
+    
+    for inicio in range(0, len(rutas), LOTE_LOG_ELIMINADOS):
+        log.debug("ELIMINADO (%s):\n%s", origen, "\n".join(rutas[inicio:inicio + LOTE_LOG_ELIMINADOS]))
+
+def eliminar_archivos_locales(ruta_base, dias, mascara=None, hilos=None):
     """
     Elimina archivos locales más antiguos que los días especificados.
     
@@ -223,40 +545,114 @@ def eliminar_archivos_locales(ruta_base, dias, mascara=None):
         ruta_base (str): Ruta local del directorio
         dias (int): Días de antigüedad máxima
         mascara (str, opcional): Patrón para filtrar nombres de archivo
+        hilos (int, opcional): Hilos para recorrer y eliminar; por defecto
+            HILOS_BORRADO_LOCAL en sistemas de archivos de red y uno en el resto
         
     Returns:
         tuple: (archivos_eliminados, archivos_con_error)
     """
     limite_tiempo = time.time() - (dias * 86400)
+    coincide_mascara = compilar_mascara(mascara)
     archivos_eliminados = 0
     archivos_con_error = 0
     archivos_procesados = 0
+    # Se consulta una vez; con --verbose las rutas eliminadas se registran
+    # agrupadas por directorio en lugar de una línea por archivo
+    detallado = log.isEnabledFor(logging.DEBUG)
+    # En NFS/CIFS cada borrado es una ida y vuelta al servidor: se solapan con
+    # varios hilos. En un disco local, salvo que se configure, sólo añadirían contención
+    if hilos is None:
+        hilos = 1
+        if es_sistema_archivos_red(ruta_base):
+            hilos = HILOS_BORRADO_LOCAL
+            logging.info(f"Ruta local {ruta_base} en sistema de archivos de red: recorrido y borrado con {hilos} hilos")
+    ejecutor = ThreadPoolExecutor(max_workers=hilos) if hilos > 1 else None
+    comprobar = functools.partial(_eliminar_si_caducado, limite_tiempo=limite_tiempo)
+    
+    # Con varios hilos el stat y el borrado de cada archivo se reparten entre
+    # los hilos y se adelanta el listado de los siguientes directorios de la
+    # pila: las idas y vueltas al servidor se solapan. Sólo se adelantan
+    # 2 * hilos listados a la vez, para que la memoria no crezca con el árbol
+    # y los borrados no esperen en la cola detrás de todos los listados
+    aplicar = ejecutor.map if ejecutor else map
+    maximo_listados = 2 * hilos
+    listados_en_curso = 0
 
     try:
-        for root, dirs, files in os.walk(ruta_base):
-            for file in files:
-                
-                if mascara and not fnmatch.fnmatch(file, mascara):
+        # Cada elemento es [directorio, listado adelantado o None]
+        pendientes = [[ruta_base, None]]
+        while pendientes:
+            directorio, listado = pendientes.pop()
+            if listado is not None:
+                listados_en_curso -= 1
+            entradas, error = listado.result() if listado is not None else _escanear_directorio(directorio)
+            if error is not None:
+                archivos_con_error += 1
+                logging.error(f"ERROR en directorio {directorio}: {str(error)}")
+                continue
+
+            eliminados_directorio = 0
+            errores_directorio = 0
+            rutas_eliminadas = []
+            candidatos = []
+
+            for entrada in entradas:
+                # Igual que os.walk: no se siguen enlaces a directorios
+                if entrada.is_dir():
+                    if not entrada.is_symlink():
+                        pendientes.append([entrada.path, None])
                     continue
-                
-                ruta_completa = os.path.join(root, file)
-                archivos_procesados += 1
 
-                try:
-                    mtime = os.path.getmtime(ruta_completa)
+                # La máscara se evalúa antes que la fecha a propósito: en POSIX
+                # entrada.stat() es una llamada al sistema (el d_type de readdir
+                # sólo da el tipo), y comparar el nombre con la expresión ya
+                # compilada es mucho más barato que un stat por archivo descartado
+                if coincide_mascara and not coincide_mascara(entrada.name):
+                    continue
+
+                candidatos.append(entrada)
+
+            if ejecutor:
+                # Se adelantan antes de borrar para solaparlos con los borrados.
+                # Los próximos en salir están al final de la pila; los que ya
+                # tienen listado no cuentan, así que se revisan pocos elementos
+                for pendiente in reversed(pendientes):
+                    if listados_en_curso >= maximo_listados:
+                        break
+                    if pendiente[1] is None:
+                        pendiente[1] = ejecutor.submit(_escanear_directorio, pendiente[0])
+                        listados_en_curso += 1
+
+            archivos_procesados += len(candidatos)
+            if len(candidatos) >= UMBRAL_ORDEN_INODO:
+                # El inodo llega con readdir: ordenar no cuesta llamadas al sistema
+                candidatos.sort(key=os.DirEntry.inode)
+
+            for entrada, (resultado, error) in zip(candidatos, aplicar(comprobar, candidatos)):
+                if resultado == 'eliminado':
+                    eliminados_directorio += 1
+                    if detallado:
+                        rutas_eliminadas.append(entrada.path)
+                elif resultado == 'enlace':
+                    errores_directorio += 1
+                    logging.error("ERROR accediendo a %s: enlace simbólico roto (%s)", entrada.path, error)
+                elif resultado == 'reciente' or isinstance(error, FileNotFoundError):
+                    # Eliminado entretanto (p. ej. por otra conexión en paralelo)
+                    continue
+                elif resultado == 'acceso':
+                    errores_directorio += 1
+                    logging.error("ERROR accediendo a %s: %s", entrada.path, error)
+                else:
+                    errores_directorio += 1
+                    logging.error("ERROR eliminando %s: %s", entrada.path, error)
+
+            registrar_eliminados('local', rutas_eliminadas)
+
+            if eliminados_directorio or errores_directorio:
+                archivos_eliminados += eliminados_directorio
+                archivos_con_error += errores_directorio
+                logging.info(f"Barrido {directorio}: {eliminados_directorio} eliminados, {errores_directorio} errores")
 
-                    if mtime < limite_tiempo:
-                        try:
-                            os.remove(ruta_completa)
-                            archivos_eliminados += 1
-                            logging.info(f"ELIMINADO (local): {ruta_completa}")
-                        except OSError as e:
-                            archivos_con_error += 1
-                            logging.error(f"ERROR eliminando {ruta_completa}: {str(e)}")
-                except OSError as e:
-                    archivos_con_error += 1
-                    logging.error(f"ERROR accediendo a {ruta_completa}: {str(e)}")
-        
         if mascara:
             logging.info(f"Resumen LOCAL {ruta_base} (máscara: '{mascara}'): {archivos_procesados} procesados, {archivos_eliminados} eliminados, {archivos_con_error} errores")
         else:
@@ -265,10 +661,37 @@ def eliminar_archivos_locales(ruta_base, dias, mascara=None):
     except Exception as e:
         logging.error(f"ERROR procesando ruta local {ruta_base}: {str(e)}")
         archivos_con_error += 1
+    finally:
+        if ejecutor:
+            ejecutor.shutdown()
 
     return archivos_eliminados, archivos_con_error
 
-def ejecutar_comando_ssh(cliente_ssh, comando, descripcion):
+def procesar_rutas(rutas, procesar_ruta):
+    """
+    Aplica procesar_ruta a cada ruta de una conexión y suma los resultados.
+    
+    Las rutas son independientes y su coste es sobre todo espera (red o
+    disco), así que cuando hay varias se procesan en paralelo con hasta
+    MAX_RUTAS_PARALELAS hilos.
+    
+    Args:
+        rutas (list): Configuraciones de ruta de la conexión
+        procesar_ruta (callable): Recibe una configuración de ruta y devuelve
+            (eliminados, errores)
+        
+    Returns:
+        tuple: (archivos_eliminados, archivos_con_error)
+    """
+    if len(rutas) <= 1:
+        resultados = [procesar_ruta(ruta_config) for ruta_config in rutas]
+    else:
+        with ThreadPoolExecutor(max_workers=min(MAX_RUTAS_PARALELAS, len(rutas))) as executor:
+            resultados = list(executor.map(procesar_ruta, rutas))
+    
+    return sum(r[0] for r in resultados), sum(r[1] for r in resultados)
+
+def ejecutar_comando_ssh(cliente_ssh, comando, descripcion, procesar_salida=None):
     """
     Ejecuta un comando SSH y retorna la salida y el estado.
     
@@ -276,20 +699,41 @@ def ejecutar_comando_ssh(cliente_ssh, comando, descripcion):
         cliente_ssh: Cliente SSH de Paramiko
         comando (str): Comando a ejecutar
         descripcion (str): Descripción para logging
+        procesar_salida (callable, opcional): Recibe la salida estándar en
+            bloques de bytes según llega; en ese caso no se acumula y la
+            salida devuelta queda vacía
         
     Returns:
         tuple: (salida, errores, exit_status)
+    
+    Raises:
+        Exception: Si el servidor no abre el canal (p. ej. por MaxSessions);
+            el comando no llega a ejecutarse y no es un fallo suyo
     """
+    stdin, stdout, stderr = cliente_ssh.exec_command(comando)
+    
     try:
-        stdin, stdout, stderr = cliente_ssh.exec_command(comando)
+        # Las salidas se leen antes de esperar el estado y stderr en otro hilo:
+        # si una de las dos llena la ventana del canal sin leerse, el comando
+        # remoto se bloquea y nunca termina
+        bloques_error = []
+        lector_errores = threading.Thread(target=lambda: bloques_error.append(stderr.read()))
+        lector_errores.daemon = True
+        lector_errores.start()
+        if procesar_salida is None:
+            salida = stdout.read().decode('utf-8').strip()
+        else:
+            salida = ""
+            for bloque in iter(functools.partial(stdout.read, BLOQUE_SALIDA_SSH), b''):
+                procesar_salida(bloque)
+        lector_errores.join()
+        errores = b''.join(bloques_error).decode('utf-8').strip()
         exit_status = stdout.channel.recv_exit_status()
-        salida = stdout.read().decode('utf-8').strip()
-        errores = stderr.read().decode('utf-8').strip()
         
         if exit_status != 0:
             logging.warning(f"Comando '{descripcion}' falló (estado {exit_status}): {errores}")
-        else:
-            logging.debug(f"Comando '{descripcion}' ejecutado exitosamente")
+        elif log.isEnabledFor(logging.DEBUG):
+            log.debug("Comando '%s' ejecutado exitosamente", descripcion)
             
         return salida, errores, exit_status
         
@@ -297,6 +741,212 @@ def ejecutar_comando_ssh(cliente_ssh, comando, descripcion):
         logging.error(f"Error ejecutando comando '{descripcion}': {str(e)}")
         return "", str(e), 1
 
+def cargar_paramiko():
+    """
+    Importa paramiko la primera vez que se necesita.
+    
+    Returns:
+        bool: True si paramiko está cargado, False si no se pudo importar
+    """
+    global paramiko
+    if paramiko is None:
+        try:
+            import paramiko as modulo
+        except ImportError as e:
+            logging.error(f"No se pudo importar paramiko: {str(e)}")
+            return False
+        paramiko = modulo
+    return True
+
+class _CanalesSSH:
+    """
+    Limita los canales abiertos a la vez sobre una conexión SSH compartida.
+    
+    sshd rechaza con un ChannelException los canales que superan su
+    MaxSessions. Como la conexión se comparte entre las rutas y los alias
+    del mismo servidor, cada uno reserva aquí los canales que va a usar
+    antes de abrirlos.
+    """
+    def __init__(self, maximo):
+        self.maximo = maximo
+        self.semaforo = threading.BoundedSemaphore(maximo)
+        self.bloqueo = threading.Lock()
+    
+    @contextlib.contextmanager
+    def reservar(self, cantidad=1):
+        """Reserva `cantidad` canales, que se liberan al salir del bloque."""
+        cantidad = min(cantidad, self.maximo)
+        # Los canales de una reserva se toman bajo un bloqueo: dos rutas que
+        # esperan su segundo canal con el primero ya tomado no se bloquean entre sí
+        with self.bloqueo:
+            for _ in range(cantidad):
+                self.semaforo.acquire()
+        try:
+            yield
+        finally:
+            for _ in range(cantidad):
+                self.semaforo.release()
+
+def obtener_cliente_ssh(conexion):
+    """
+    Devuelve un cliente SSH conectado al servidor de la conexión.
+    
+    Si otro alias ya abrió una conexión al mismo host, puerto y usuario y
+    sigue viva se reutiliza, evitando repetir el handshake y la autenticación.
+    Los clientes se cierran al terminar el proceso de limpieza
+    (cerrar_conexiones_ssh). Los canales que se abran sobre él se reservan
+    antes con obtener_canales_ssh.
+    
+    Args:
+        conexion (dict): Configuración de conexión SSH/SFTP
+        
+    Returns:
+        paramiko.SSHClient: Cliente conectado
+    """
+    clave = (conexion['host'], conexion.get('puerto', 22), conexion['usuario'])
+    
+    with _bloqueo_pool_ssh:
+        bloqueo = _bloqueos_ssh.setdefault(clave, threading.Lock())
+    
+    with bloqueo:
+        cliente = _conexiones_ssh.pop(clave, None)
+        if cliente is not None:
+            transporte = cliente.get_transport()
+            try:
+                if transporte is not None and transporte.is_active():
+                    transporte.send_ignore()
+                    _conexiones_ssh[clave] = cliente
+                    logging.info(f"Reutilizando conexión SSH a {conexion['host']}:{conexion.get('puerto', 22)} (alias: {conexion['alias']})")
+                    return cliente
+            except Exception as e:
+                logging.warning(f"Conexión SSH a {conexion['host']} no disponible, se reconecta: {e}")
+            cliente.close()
+        
+        cliente = paramiko.SSHClient()
+        cliente.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        cliente.connect(
+            hostname=conexion['host'],
+            port=conexion.get('puerto', 22),
+            username=conexion['usuario'],
+            password=conexion['contrasena'],
+            timeout=30
+        )
+        cliente.get_transport().set_keepalive(KEEPALIVE_SSH)
+        _conexiones_ssh[clave] = cliente
+        
+        # El límite lo fija el alias que abre la conexión
+        maximo = conexion.get('max_canales_ssh', MAX_CANALES_SSH)
+        if not isinstance(maximo, int) or isinstance(maximo, bool) or maximo < 2:
+            logging.warning(f"Valor no válido para max_canales_ssh en {conexion['alias']}: {maximo!r}. Se usará {MAX_CANALES_SSH}")
+            maximo = MAX_CANALES_SSH
+        _canales_ssh[clave] = _CanalesSSH(maximo)
+        return cliente
+
+def obtener_canales_ssh(conexion):
+    """
+    Devuelve el límite de canales de la conexión abierta con obtener_cliente_ssh.
+    
+    Args:
+        conexion (dict): Configuración de conexión SSH/SFTP
+        
+    Returns:
+        _CanalesSSH: Límite compartido por todos los que usan la conexión
+    """
+    return _canales_ssh[(conexion['host'], conexion.get('puerto', 22), conexion['usuario'])]
+
+def cerrar_conexiones_ssh():
+    """
+    Cierra todas las conexiones SSH compartidas.
+    """
+    with _bloqueo_pool_ssh:
+        clientes = list(_conexiones_ssh.values())
+        _conexiones_ssh.clear()
+        _canales_ssh.clear()
+    
+    for cliente in clientes:
+        try:
+            cliente.close()
+        except Exception:
+            pass
+
+atexit.register(cerrar_conexiones_ssh)
+
+class _ListadoEliminados:
+    """
+    Cuenta y registra las rutas que lista find según llegan por la salida.
+    
+    Sólo retiene el último fragmento incompleto y, con --verbose, las rutas
+    pendientes de registrar (como mucho LOTE_LOG_ELIMINADOS), de modo que
+    un find que elimina millones de archivos no acumula su listado en memoria.
+    """
+    def __init__(self, origen, separador):
+        self.origen = origen
+        self.separador = separador.encode()
+        self.detallado = log.isEnabledFor(logging.DEBUG)
+        self.recibido = False
+        self.total = 0
+        self.resto = b''
+        self.pendientes = []
+    
+    def __call__(self, bloque):
+        self.recibido = True
+        partes = (self.resto + bloque).split(self.separador)
+        self.resto = partes.pop()
+        self._anadir(partes)
+    
+    def _anadir(self, partes):
+        for parte in partes:
+            if not parte.strip():
+                continue
+            self.total += 1
+            if self.detallado:
+                self.pendientes.append(parte.decode('utf-8', 'replace'))
+                if len(self.pendientes) >= LOTE_LOG_ELIMINADOS:
+                    self.vaciar()
+    
+    def vaciar(self):
+        """Registra las rutas pendientes; al terminar, también el último fragmento."""
+        if self.resto:
+            self._anadir([self.resto])
+            self.resto = b''
+        registrar_eliminados(self.origen, self.pendientes)
+        self.pendientes = []
+
+# Comillas con las que find cita rutas y predicados en sus mensajes de error
+COMILLAS_FIND = "`'\"‘’«»"
+
+def find_rechaza_predicado(errores, predicado):
+    """
+    Indica si find rechazó un predicado (p. ej. -delete) por no admitirlo.
+    
+    Sólo cuentan los mensajes del propio find (líneas "find: ...") que
+    nombran el predicado como argumento suelto. Las rutas se descartan antes:
+    un error de permisos en un archivo llamado "x-delete" no debe hacer
+    pensar que find no admite -delete.
+    
+    Args:
+        errores (str): Salida de errores de find
+        predicado (str): Predicado con su guion, p. ej. '-newermt'
+        
+    Returns:
+        bool: True si algún mensaje de find rechaza el predicado
+    """
+    comillas = re.escape(COMILLAS_FIND)
+    patron = re.compile(rf"(?:^|[\s:{comillas}]){re.escape(predicado)}(?=$|[\s:,{comillas}])")
+    ruta_citada = re.compile(rf"[{comillas}][^{comillas}]*/[^{comillas}]*[{comillas}]")
+    
+    for linea in errores.split('\n'):
+        linea = linea.strip()
+        if not linea.startswith('find:'):
+            continue
+        # Las rutas buscadas son absolutas: todas llevan '/', que no aparece
+        # en ningún predicado. Una ruta sin comillas justo tras "find:" es un
+        # error sobre un archivo, no sobre el comando
+        mensaje = ruta_citada.sub('', linea[len('find:'):]).strip()
+        if not mensaje.startswith('/') and patron.search(mensaje):
+            return True
+    return False
+
 def eliminar_archivos_ssh(conexion):
     """
     Elimina archivos remotos vía SSH más antiguos que los días especificados.
@@ -308,7 +958,7 @@ def eliminar_archivos_ssh(conexion):
     Returns:
         tuple: (archivos_eliminados_totales, archivos_con_error_totales)
     """
-    if not PARAMIKO_DISPONIBLE:
+    if not PARAMIKO_DISPONIBLE or not cargar_paramiko():
         logging.error("No se puede procesar configuración SSH: paramiko no está instalado")
         return 0, 1
 
@@ -316,21 +966,27 @@ def eliminar_archivos_ssh(conexion):
     archivos_con_error_totales = 0
     necesita_sudo = conexion.get('necesita_sudo', False)
     comando_sudo = "sudo " if necesita_sudo else ""
+    # Referencia común para el umbral de antigüedad de todas las rutas
+    ahora = time.time()
 
     try:
-        cliente_ssh = paramiko.SSHClient()
-        cliente_ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        
         logging.info(f"Conectando SSH a {conexion['host']}:{conexion.get('puerto', 22)} (alias: {conexion['alias']})")
-        cliente_ssh.connect(
-            hostname=conexion['host'],
-            port=conexion.get('puerto', 22),
-            username=conexion['usuario'],
-            password=conexion['contrasena'],
-            timeout=30
-        )
+        cliente_ssh = obtener_cliente_ssh(conexion)
+        canales = obtener_canales_ssh(conexion)
         
-        for ruta_config in conexion['rutas']:
+        # Pasan a False si el find del servidor no admite -newermt o -delete
+        # (p. ej. find POSIX estricto o BusyBox): se deja de intentar en el resto de rutas
+        newermt_disponible = True
+        delete_disponible = True
+        
+        def procesar_ruta_ssh(ruta_config):
+            """
+            Función interna que limpia una ruta con un canal propio del cliente.
+            
+            Returns:
+                tuple: (eliminados, errores) de la ruta
+            """
+            nonlocal newermt_disponible, delete_disponible
             ruta = ruta_config['ruta']
             dias = ruta_config['dias']
             mascara = ruta_config.get('mascara')
@@ -340,67 +996,106 @@ def eliminar_archivos_ssh(conexion):
             else:
                 logging.info(f"  Procesando ruta SSH: {ruta} - {dias} días")
             
-            comando_test = f"{comando_sudo}ls {ruta}"
-            salida, errores, estado = ejecutar_comando_ssh(cliente_ssh, comando_test, f"verificar ruta {ruta}")
+            # Un único comando que comprueba la ruta, elimina y lista lo eliminado:
+            # una sola ida y vuelta por ruta en lugar de un rm por archivo. Las rutas
+            # se separan con NUL para que un nombre con saltos de línea cuente una vez.
+            # El umbral exacto (en UTC) se calcula aquí, en lugar de los días
+            # completos de -mtime: con -newermt va en el propio find y, si no se
+            # admite, se fecha con él un archivo de referencia para ! -newer
+            limite = time.gmtime(ahora - dias * 86400)
+            # Ruta y máscara entrecomilladas para el shell remoto: un nombre con
+            # comillas o espacios no rompe el comando ni inyecta otro
+            ruta_shell = shlex.quote(ruta)
+            comando_test = f"{comando_sudo}test -d {ruta_shell}"
+            filtro_nombre = f" -name {shlex.quote(mascara)}" if mascara else ""
             
-            if estado != 0:
-                logging.error(f"No se puede acceder a la ruta {ruta}: {errores}")
-                archivos_con_error_totales += 1
-                continue
+            def comando_find(usar_newermt, accion):
+                if usar_newermt:
+                    fecha = time.strftime('%Y-%m-%d %H:%M:%S', limite)
+                    return f"{comando_test} && {comando_sudo}find {ruta_shell} -type f{filtro_nombre} ! -newermt '{fecha} UTC' {accion}"
+                umbral = time.strftime('%Y%m%d%H%M.%S', limite)
+                return (
+                    f"ref=$(mktemp) && TZ=UTC0 touch -t {umbral} \"$ref\" && "
+                    f"{comando_test} && {comando_sudo}find {ruta_shell} -type f{filtro_nombre} ! -newer \"$ref\" {accion}; "
+                    f"estado=$?; rm -f \"$ref\"; exit $estado"
+                )
             
-            if mascara:
-                comando_find = f"{comando_sudo}find {ruta} -type f -name '{mascara}' -mtime +{dias} -print"
-            else:
-                comando_find = f"{comando_sudo}find {ruta} -type f -mtime +{dias} -print"
+            while True:
+                # Se fijan por intento: otra ruta en paralelo puede cambiar los indicadores
+                usar_newermt = newermt_disponible
+                usar_delete = delete_disponible
+                if usar_delete:
+                    separador = '\0'
+                    accion = "-delete -print0"
+                else:
+                    # POSIX: rm por archivo dentro del mismo find; -print sólo se
+                    # evalúa (y lista el archivo) si el rm terminó bien
+                    separador = '\n'
+                    accion = "-exec rm {} \\; -print"
                 
-            salida, errores, estado = ejecutar_comando_ssh(cliente_ssh, comando_find, f"buscar archivos en {ruta}")
+                # Las rutas eliminadas se cuentan según llegan, sin acumular el listado
+                listado = _ListadoEliminados('SSH', separador)
+                try:
+                    with canales.reservar():
+                        _, errores, estado = ejecutar_comando_ssh(
+                            cliente_ssh, comando_find(usar_newermt, accion), f"eliminar archivos en {ruta}", listado)
+                except Exception as e:
+                    logging.error(f"ERROR SSH: el servidor no abrió un canal para la ruta {ruta}: {e}")
+                    return 0, 1
+                
+                # find rechaza el predicado antes de recorrer nada: sin salida
+                if estado == 0 or listado.recibido:
+                    break
+                if usar_newermt and find_rechaza_predicado(errores, '-newermt'):
+                    if newermt_disponible:
+                        logging.info(f"  find sin soporte de -newermt en {conexion['host']}, se usará un archivo de referencia: {errores}")
+                        newermt_disponible = False
+                elif usar_delete and find_rechaza_predicado(errores, '-delete'):
+                    if delete_disponible:
+                        logging.info(f"  find sin soporte de -delete en {conexion['host']}, se usará -exec rm: {errores}")
+                        delete_disponible = False
+                else:
+                    break
             
-            if estado != 0 and "No such file or directory" not in errores:
-                logging.error(f"Error buscando archivos en {ruta}: {errores}")
+            # Si test -d falla no se llega a ejecutar find y no hay salida alguna
+            if estado != 0 and not listado.recibido and not errores:
+                logging.error(f"No se puede acceder a la ruta {ruta}: no existe o no es un directorio")
+                return 0, 1
             
-            archivos_a_eliminar = [archivo for archivo in salida.split('\n') if archivo.strip()]
+            listado.vaciar()
+            
+            # Sólo se listan los archivos borrados; cada línea de error de find
+            # (o de rm) corresponde a un archivo que no se pudo eliminar
+            errores_eliminacion = []
+            if estado != 0:
+                errores_eliminacion = [
+                    linea for linea in errores.split('\n')
+                    if linea.strip() and "No such file or directory" not in linea
+                ]
             
-            if not archivos_a_eliminar:
+            if not listado.total and not errores_eliminacion:
                 if mascara:
                     logging.info(f"No se encontraron archivos con máscara '{mascara}' para eliminar en {ruta} (más antiguos de {dias} días)")
                 else:
                     logging.info(f"No se encontraron archivos para eliminar en {ruta} (más antiguos de {dias} días)")
-                continue
-            
-            logging.info(f"Encontrados {len(archivos_a_eliminar)} archivos para eliminar en {ruta}")
+                return 0, 0
             
-            archivos_eliminados_ruta = 0
-            archivos_con_error_ruta = 0
+            for linea in errores_eliminacion:
+                logging.error("ERROR eliminando en %s: %s", ruta, linea)
             
-            for archivo in archivos_a_eliminar:
-                archivo = archivo.strip()
-                if not archivo:
-                    continue
-                    
-                try:
-                    comando_eliminar = f"{comando_sudo}rm -f '{archivo}'"
-                    salida, errores, estado = ejecutar_comando_ssh(cliente_ssh, comando_eliminar, f"eliminar {archivo}")
-                    
-                    if estado == 0:
-                        archivos_eliminados_ruta += 1
-                        archivos_eliminados_totales += 1
-                        logging.info(f"ELIMINADO (SSH): {archivo}")
-                    else:
-                        archivos_con_error_ruta += 1
-                        archivos_con_error_totales += 1
-                        logging.error(f"ERROR eliminando {archivo}: {errores}")
-                        
-                except Exception as e:
-                    archivos_con_error_ruta += 1
-                    archivos_con_error_totales += 1
-                    logging.error(f"ERROR procesando {archivo}: {str(e)}")
+            archivos_eliminados_ruta = listado.total
+            archivos_con_error_ruta = len(errores_eliminacion)
             
             if mascara:
                 logging.info(f"  Resumen ruta {ruta} (máscara: '{mascara}'): {archivos_eliminados_ruta} eliminados, {archivos_con_error_ruta} errores")
             else:
                 logging.info(f"  Resumen ruta {ruta}: {archivos_eliminados_ruta} eliminados, {archivos_con_error_ruta} errores")
+            
+            return archivos_eliminados_ruta, archivos_con_error_ruta
         
-        cliente_ssh.close()
+        # Cada ruta usa su propio canal sobre el mismo transporte, así que las
+        # rutas del servidor se limpian a la vez
+        archivos_eliminados_totales, archivos_con_error_totales = procesar_rutas(conexion['rutas'], procesar_ruta_ssh)
         
     except paramiko.AuthenticationException:
         logging.error(f"ERROR SSH: Autenticación fallida para {conexion['usuario']}@{conexion['host']}")
@@ -414,6 +1109,106 @@ def eliminar_archivos_ssh(conexion):
 
     return archivos_eliminados_totales, archivos_con_error_totales
 
+# Peticiones de borrado SFTP que se mantienen en vuelo a la vez, salvo que la
+# conexión fije max_peticiones_sftp
+VENTANA_SFTP = 32
+# Archivos que se acumulan en el recorrido SFTP antes de eliminarlos
+LOTE_SFTP = 1000
+# Segundos sin respuesta del servidor tras los que una petición SFTP falla
+TIMEOUT_SFTP = 30
+
+class _RespuestasSFTP:
+    """
+    Recoge las respuestas de peticiones SFTP asíncronas en el orden en que lleguen.
+    """
+    def __init__(self):
+        self.respuestas = {}
+    
+    def _async_response(self, tipo, mensaje, numero):
+        self.respuestas[numero] = (tipo, mensaje)
+
+def abrir_sftp(transporte):
+    """
+    Abre un cliente SFTP sobre un transporte ya autenticado.
+    
+    El canal lleva un timeout de TIMEOUT_SFTP: un servidor que deja de
+    responder produce un error en la ruta en lugar de bloquear el proceso.
+    
+    Args:
+        transporte: Transporte de Paramiko
+        
+    Returns:
+        paramiko.SFTPClient: Cliente SFTP
+    """
+    sftp = paramiko.SFTPClient.from_transport(transporte)
+    sftp.get_channel().settimeout(TIMEOUT_SFTP)
+    return sftp
+
+def eliminar_lote_sftp(sftp, rutas, ventana=VENTANA_SFTP):
+    """
+    Elimina varios archivos por SFTP encadenando las peticiones.
+    
+    En lugar de esperar la respuesta de cada SSH_FXP_REMOVE antes de enviar
+    el siguiente, mantiene hasta `ventana` peticiones en vuelo sobre el
+    mismo canal. Si la versión de paramiko no expone la API asíncrona se
+    eliminan de uno en uno. Si el canal falla a mitad del lote no se lanza
+    el error: las rutas sin respuesta se devuelven con él.
+    
+    Args:
+        sftp: Cliente SFTP de Paramiko
+        rutas (list): Rutas remotas a eliminar
+        ventana (int): Máximo de peticiones sin respuesta
+        
+    Returns:
+        list: Tuplas (ruta, error), con error None si se eliminó
+    """
+    resultados = []
+    
+    if not hasattr(sftp, '_async_request'):
+        for ruta in rutas:
+            try:
+                sftp.remove(ruta)
+                resultados.append((ruta, None))
+            except Exception as e:
+                resultados.append((ruta, e))
+        return resultados
+    
+    respuestas = _RespuestasSFTP()
+    pendientes = {}
+    
+    def recoger_respuesta():
+        sftp._read_response()
+        for numero, (tipo, mensaje) in respuestas.respuestas.items():
+            ruta = pendientes.pop(numero)
+            try:
+                if tipo != paramiko.sftp.CMD_STATUS:
+                    raise paramiko.SFTPError(f"Respuesta inesperada al eliminar (tipo {tipo})")
+                # Lanza IOError con el errno adecuado si el servidor devolvió error
+                sftp._convert_status(mensaje)
+                resultados.append((ruta, None))
+            except Exception as e:
+                resultados.append((ruta, e))
+        respuestas.respuestas.clear()
+    
+    enviadas = 0
+    try:
+        for ruta in rutas:
+            numero = sftp._async_request(respuestas, paramiko.sftp.CMD_REMOVE, sftp._adjust_cwd(ruta))
+            pendientes[numero] = ruta
+            enviadas += 1
+            while len(pendientes) >= ventana:
+                recoger_respuesta()
+        
+        while pendientes:
+            recoger_respuesta()
+    except Exception as e:
+        # El canal ha fallado (p. ej. por timeout): se conservan los resultados
+        # ya recibidos y las peticiones sin respuesta o sin enviar se dan por fallidas
+        resultados.extend((ruta, e) for ruta in pendientes.values())
+        resultados.extend((ruta, e) for ruta in rutas[enviadas:])
+    
+    return resultados
+
 def eliminar_archivos_sftp(conexion):
     """
     Elimina archivos remotos vía SFTP más antiguos que los días especificados.
@@ -425,62 +1220,251 @@ def eliminar_archivos_sftp(conexion):
     Returns:
         tuple: (archivos_eliminados_totales, archivos_con_error_totales)
     """
-    if not PARAMIKO_DISPONIBLE:
+    if not PARAMIKO_DISPONIBLE or not cargar_paramiko():
         logging.error("No se puede procesar configuración SFTP: paramiko no está instalado")
         return 0, 1
 
     archivos_eliminados_totales = 0
     archivos_con_error_totales = 0
+    # Referencia común para el umbral de antigüedad de todas las rutas
+    ahora = time.time()
+    
+    ventana = conexion.get('max_peticiones_sftp', VENTANA_SFTP)
+    if not isinstance(ventana, int) or isinstance(ventana, bool) or ventana < 1:
+        logging.warning(f"Valor no válido para max_peticiones_sftp en {conexion['alias']}: {ventana!r}. Se usará {VENTANA_SFTP}")
+        ventana = VENTANA_SFTP
 
     try:
-        # Conectar al servidor SFTP (una sola vez)
-        transporte = paramiko.Transport((conexion['host'], conexion.get('puerto', 22)))
-        transporte.connect(username=conexion['usuario'], password=conexion['contrasena'])
-        
-        sftp = paramiko.SFTPClient.from_transport(transporte)
+        # Conectar al servidor SFTP (una sola vez, compartida con otros alias del mismo servidor)
+        transporte = obtener_cliente_ssh(conexion).get_transport()
+        # Cada ruta en curso ocupa un canal SFTP y, mientras lanza find, otro
+        # de ejecución; los reserva antes de abrirlos
+        canales = obtener_canales_ssh(conexion)
         logging.info(f"Conectado SFTP a {conexion['host']}:{conexion.get('puerto', 22)} (alias: {conexion['alias']})")
         
-        def procesar_directorio_sftp(ruta_remota, dias, mascara=None):
+        # Pasa a False si el servidor no permite ejecutar comandos (cuentas sólo SFTP)
+        exec_disponible = True
+        # Pasa a False si find no admite -delete/-newermt: entonces sólo lista los
+        # archivos y se eliminan vía SFTP
+        find_delete_disponible = True
+        marca_fin = "__LIMPIEZA_FIN__"
+        
+        def ejecutar_en_servidor(comando):
             """
-            Función interna para procesar recursivamente un directorio SFTP.
+            Ejecuta un comando por un canal SSH del mismo transporte.
+            
+            Returns:
+                tuple: (lineas, estado) de la salida combinada, o None si el
+                servidor no ejecutó el comando
             """
-            nonlocal archivos_eliminados_totales, archivos_con_error_totales
-            limite_tiempo = time.time() - (dias * 86400)
+            nonlocal exec_disponible
             
             try:
-                for atributo in sftp.listdir_attr(ruta_remota):
-                    ruta_completa = f"{ruta_remota}/{atributo.filename}".replace('//', '/')
-                    
-                    if atributo.filename in ['.', '..']:
-                        continue
-                    
-                    try:
-                        sftp.listdir(ruta_completa)
-                        procesar_directorio_sftp(ruta_completa, dias, mascara)
-                    except:
-                        if mascara:
-                            import fnmatch
-                            if not fnmatch.fnmatch(atributo.filename, mascara):
+                canal = transporte.open_session(timeout=30)
+            except Exception as e:
+                # Rechazo del canal (p. ej. por MaxSessions), no de la ejecución:
+                # sólo esta ruta se recorre vía SFTP
+                logging.warning(f"  El servidor no abrió un canal de ejecución, se recorrerá vía SFTP: {e}")
+                return None
+            
+            try:
+                canal.set_combine_stderr(True)
+                canal.exec_command(f"{comando}; echo {marca_fin} $?")
+                # Sin stdin: un ForceCommand internal-sftp termina en lugar de esperar
+                canal.shutdown_write()
+                salida = canal.makefile('rb').read().decode('utf-8', 'replace')
+                canal.close()
+            except paramiko.SSHException as e:
+                logging.info(f"  El servidor no permite ejecutar comandos, se recorrerá vía SFTP: {e}")
+                exec_disponible = False
+                return None
+            
+            lineas = [linea for linea in salida.split('\n') if linea.strip()]
+            marcas = [linea for linea in lineas if linea.startswith(marca_fin)]
+            if not marcas or marcas[-1][len(marca_fin):].strip() == '127':
+                logging.info("  El servidor no ejecutó find, se recorrerá vía SFTP")
+                exec_disponible = False
+                return None
+            
+            estado = marcas[-1][len(marca_fin):].strip()
+            return [linea for linea in lineas if not linea.startswith(marca_fin)], estado
+        
+        def eliminar_con_find(sftp, ruta_remota, dias, mascara=None):
+            """
+            Elimina en el servidor con un único find lanzado por un canal SSH
+            del mismo transporte, en lugar de recorrer el árbol vía SFTP.
+            
+            Si find no admite -delete se usa sólo para listar los archivos
+            caducados, que se eliminan con peticiones SFTP encadenadas.
+            
+            Returns:
+                tuple: (eliminados, errores), o None si el servidor no ejecutó el find
+            """
+            nonlocal find_delete_disponible
+            
+            filtro_nombre = f" -name {shlex.quote(mascara)}" if mascara else ""
+            # Umbral exacto al segundo (en UTC), el mismo que el del recorrido SFTP
+            limite = time.gmtime(ahora - dias * 86400)
+            
+            if find_delete_disponible:
+                fecha = time.strftime('%Y-%m-%d %H:%M:%S', limite)
+                resultado = ejecutar_en_servidor(
+                    f"find {shlex.quote(ruta_remota)} -type f{filtro_nombre} ! -newermt '{fecha} UTC' -delete -print"
+                )
+                if resultado is None:
+                    return None
+                
+                lineas, estado = resultado
+                errores_find = '\n'.join(linea for linea in lineas if linea.startswith('find:'))
+                
+                if not (find_rechaza_predicado(errores_find, '-delete') or find_rechaza_predicado(errores_find, '-newermt')):
+                    eliminados = []
+                    errores = 0
+                    for linea in lineas:
+                        if linea.startswith('find:'):
+                            # La ruta ya se verificó; un archivo desaparecido no es un error
+                            if "No such file or directory" in linea:
                                 continue
-                                
-                        try:
-                            mtime = atributo.st_mtime
-                            
-                            if mtime < limite_tiempo:
-                                sftp.remove(ruta_completa)
-                                archivos_eliminados_totales += 1
-                                logging.info(f"ELIMINADO (SFTP): {ruta_completa}")
-                            else:
-                                logging.debug(f"Conservado (SFTP): {ruta_completa}")
-                        except Exception as e:
-                            archivos_con_error_totales += 1
-                            logging.error(f"ERROR procesando {ruta_completa} (SFTP): {str(e)}")
-                            
+                            errores += 1
+                            logging.error("ERROR eliminando en %s (SFTP): %s", ruta_remota, linea)
+                        else:
+                            eliminados.append(linea)
+                    
+                    registrar_eliminados('SFTP', eliminados)
+                    return len(eliminados), errores
+                
+                logging.info("  find sin soporte de -delete/-newermt, se usará para listar y se eliminará vía SFTP")
+                find_delete_disponible = False
+            
+            # find POSIX: el umbral se fija con un archivo de referencia
+            umbral = time.strftime('%Y%m%d%H%M.%S', limite)
+            resultado = ejecutar_en_servidor(
+                f"ref=$(mktemp) && TZ=UTC0 touch -t {umbral} \"$ref\" && "
+                f"find {shlex.quote(ruta_remota)} -type f{filtro_nombre} ! -newer \"$ref\" -print; "
+                f"estado=$?; rm -f \"$ref\"; (exit $estado)"
+            )
+            if resultado is None:
+                return None
+            
+            lineas, estado = resultado
+            # Las rutas listadas empiezan por la ruta buscada; el resto son errores
+            caducados = [linea for linea in lineas if linea.startswith(ruta_remota)]
+            errores = 0
+            for linea in lineas:
+                if linea.startswith(ruta_remota) or "No such file or directory" in linea:
+                    continue
+                errores += 1
+                logging.error("ERROR listando en %s (SFTP): %s", ruta_remota, linea)
+            
+            eliminados, errores_eliminacion = eliminar_candidatos_sftp(sftp, caducados)
+            return eliminados, errores + errores_eliminacion
+        
+        def eliminar_candidatos_sftp(sftp, candidatos):
+            """
+            Función interna que elimina en un solo lote los archivos acumulados.
+            
+            Vacía la lista recibida y devuelve (eliminados, errores).
+            """
+            lote = candidatos[:]
+            del candidatos[:]
+            eliminados = []
+            errores = 0
+            
+            # Un fallo del lote cuenta un error por archivo y no interrumpe la ruta:
+            # lo eliminado en lotes anteriores sigue contando
+            try:
+                resultados = eliminar_lote_sftp(sftp, lote, ventana)
             except Exception as e:
-                archivos_con_error_totales += 1
-                logging.error(f"ERROR en directorio {ruta_remota} (SFTP): {str(e)}")
+                resultados = [(ruta_completa, e) for ruta_completa in lote]
+            
+            for ruta_completa, error in resultados:
+                if error is None:
+                    eliminados.append(ruta_completa)
+                elif not isinstance(error, FileNotFoundError):
+                    # Un archivo ya eliminado (p. ej. por otra ruta en paralelo) no es un error
+                    errores += 1
+                    logging.error("ERROR procesando %s (SFTP): %s", ruta_completa, error)
+            
+            registrar_eliminados('SFTP', eliminados)
+            return len(eliminados), errores
         
-        for ruta_config in conexion['rutas']:
+        def recorrer_directorio_sftp(sftp, ruta_base, limite_tiempo, coincide_mascara=None):
+            """
+            Función interna que recorre un árbol SFTP con una pila explícita.
+            
+            Los archivos caducados se acumulan entre directorios para que
+            también los directorios con pocos archivos llenen la ventana de
+            eliminar_lote_sftp. Se eliminan los archivos modificados antes de
+            limite_tiempo; coincide_mascara es la máscara ya compilada con
+            compilar_mascara.
+            
+            Returns:
+                tuple: (eliminados, errores)
+            """
+            eliminados = 0
+            errores = 0
+            candidatos = []
+            pendientes = [ruta_base]
+            
+            while pendientes:
+                ruta_remota = pendientes.pop()
+                
+                # El prefijo se normaliza una vez por directorio, no por entrada
+                prefijo = f"{ruta_remota}/".replace('//', '/')
+                try:
+                    for atributo in sftp.listdir_attr(ruta_remota):
+                        ruta_completa = prefijo + atributo.filename
+                        
+                        if atributo.filename in ['.', '..']:
+                            continue
+                        
+                        # El tipo llega en los atributos del propio listado (sin
+                        # seguir enlaces); sólo si el servidor no lo envía se
+                        # comprueba listando la entrada
+                        if atributo.st_mode is not None:
+                            if stat.S_ISDIR(atributo.st_mode):
+                                pendientes.append(ruta_completa)
+                                continue
+                            if not stat.S_ISREG(atributo.st_mode):
+                                # Enlaces, sockets, FIFOs...: igual que find -type f
+                                continue
+                        else:
+                            try:
+                                sftp.listdir(ruta_completa)
+                                pendientes.append(ruta_completa)
+                                continue
+                            except Exception:
+                                pass
+                        
+                        if coincide_mascara and not coincide_mascara(atributo.filename):
+                            continue
+                        
+                        if atributo.st_mtime < limite_tiempo:
+                            candidatos.append(ruta_completa)
+                            if len(candidatos) >= LOTE_SFTP:
+                                eliminados_lote, errores_lote = eliminar_candidatos_sftp(sftp, candidatos)
+                                eliminados += eliminados_lote
+                                errores += errores_lote
+                        elif log.isEnabledFor(logging.DEBUG):
+                            log.debug("Conservado (SFTP): %s", ruta_completa)
+                
+                except Exception as e:
+                    errores += 1
+                    logging.error(f"ERROR en directorio {ruta_remota} (SFTP): {str(e)}")
+            
+            eliminados_lote, errores_lote = eliminar_candidatos_sftp(sftp, candidatos)
+            eliminados += eliminados_lote
+            errores += errores_lote
+            
+            return eliminados, errores
+        
+        def procesar_ruta_sftp(ruta_config):
+            """
+            Función interna que limpia una ruta con un cliente SFTP propio.
+            
+            Returns:
+                tuple: (eliminados, errores) de la ruta
+            """
             ruta = ruta_config['ruta']
             dias = ruta_config['dias']
             mascara = ruta_config.get('mascara')
@@ -490,29 +1474,50 @@ def eliminar_archivos_sftp(conexion):
             else:
                 logging.info(f"  Procesando ruta SFTP: {ruta} - {dias} días")
             
+            # Un SFTPClient no admite peticiones de varios hilos a la vez: cada
+            # ruta abre uno propio sobre el transporte y lo cierra al acabar
+            with canales.reservar(2 if exec_disponible else 1):
+                try:
+                    cliente = abrir_sftp(transporte)
+                except Exception as e:
+                    logging.error(f"ERROR SFTP: el servidor no abrió un canal para la ruta {ruta}: {e}")
+                    return 0, 1
+                
+                try:
+                    return limpiar_ruta_sftp(cliente, ruta, dias, mascara)
+                finally:
+                    cliente.close()
+        
+        def limpiar_ruta_sftp(cliente, ruta, dias, mascara):
+            """
+            Función interna que limpia una ruta con el cliente SFTP recibido.
+            
+            Returns:
+                tuple: (eliminados, errores) de la ruta
+            """
             try:
-                sftp.listdir(ruta)
+                cliente.listdir(ruta)
                 logging.info(f"  Ruta verificada: {ruta}")
                 
-                archivos_antes = archivos_eliminados_totales
-                errores_antes = archivos_con_error_totales
+                resultado = eliminar_con_find(cliente, ruta, dias, mascara) if exec_disponible else None
                 
-                procesar_directorio_sftp(ruta, dias, mascara)
+                if resultado is None:
+                    resultado = recorrer_directorio_sftp(cliente, ruta, ahora - dias * 86400, compilar_mascara(mascara))
                 
-                eliminados_ruta = archivos_eliminados_totales - archivos_antes
-                errores_ruta = archivos_con_error_totales - errores_antes
+                eliminados_ruta, errores_ruta = resultado
                 
                 if mascara:
                     logging.info(f"  Resumen ruta {ruta} (máscara: '{mascara}'): {eliminados_ruta} eliminados, {errores_ruta} errores")
                 else:
                     logging.info(f"  Resumen ruta {ruta}: {eliminados_ruta} eliminados, {errores_ruta} errores")
                 
+                return eliminados_ruta, errores_ruta
+                
             except Exception as e:
                 logging.error(f"La ruta no existe o no es accesible: {ruta} - Error: {e}")
-                archivos_con_error_totales += 1
+                return 0, 1
         
-        sftp.close()
-        transporte.close()
+        archivos_eliminados_totales, archivos_con_error_totales = procesar_rutas(conexion['rutas'], procesar_ruta_sftp)
         
     except paramiko.AuthenticationException:
         logging.error(f"ERROR SFTP: Autenticación fallida para {conexion['usuario']}@{conexion['host']}")
@@ -523,10 +1528,84 @@ def eliminar_archivos_sftp(conexion):
 
     return archivos_eliminados_totales, archivos_con_error_totales
 
+# Órdenes DELE que se envían seguidas por una conexión de control FTP, salvo
+# que la conexión fije max_peticiones_ftp
+VENTANA_FTP = 32
+
+def convertir_fecha_ftp(valor):
+    """
+    Convierte una fecha FTP (MLSD 'modify' o respuesta MDTM) a timestamp.
+    
+    Args:
+        valor (str): Fecha en formato YYYYMMDDHHMMSS[.sss], en UTC (RFC 3659)
+        
+    Returns:
+        float: Timestamp Unix equivalente
+    """
+    return calendar.timegm(time.strptime(valor[:14], '%Y%m%d%H%M%S'))
+
+def eliminar_lote_ftp(ftp, rutas, ventana=VENTANA_FTP):
+    """
+    Elimina varios archivos por FTP encadenando las órdenes DELE.
+    
+    En lugar de esperar la respuesta de cada DELE antes de enviar la
+    siguiente, escribe hasta `ventana` órdenes seguidas en la conexión de
+    control y después lee sus respuestas, que el servidor devuelve en orden.
+    
+    Si la conexión falla a mitad de una ventana (timeout, cierre, respuesta
+    ilegible) quedan respuestas sin leer: se cierra la conexión, que no debe
+    reutilizarse (ftp.sock queda en None), y las rutas sin respuesta o sin
+    enviar se devuelven con el error.
+    
+    Args:
+        ftp: Conexión ftplib.FTP
+        rutas (list): Rutas remotas a eliminar
+        ventana (int): Máximo de órdenes sin respuesta
+        
+    Returns:
+        list: Tuplas (ruta, error), con error None si se eliminó
+    """
+    import ftplib
+    
+    resultados = []
+    
+    for inicio in range(0, len(rutas), ventana):
+        enviadas = []
+        for ruta in rutas[inicio:inicio + ventana]:
+            # Un salto de línea partiría la orden en dos y desordenaría las respuestas
+            if '\r' in ruta or '\n' in ruta:
+                resultados.append((ruta, ValueError("la ruta contiene saltos de línea")))
+            else:
+                enviadas.append(ruta)
+        if not enviadas:
+            continue
+        
+        respondidas = 0
+        try:
+            ftp.sock.sendall(''.join(f"DELE {ruta}\r\n" for ruta in enviadas).encode(ftp.encoding))
+            for ruta in enviadas:
+                try:
+                    respuesta = ftp.getresp()
+                    if respuesta[:3] not in ('250', '200'):
+                        raise ftplib.error_reply(respuesta)
+                    resultados.append((ruta, None))
+                except (ftplib.error_reply, ftplib.error_temp, ftplib.error_perm) as e:
+                    resultados.append((ruta, e))
+                respondidas += 1
+        except Exception as e:
+            ftp.close()
+            error = ConnectionError(f"se perdió la conexión FTP: {e!r}")
+            resultados.extend((ruta, error) for ruta in enviadas[respondidas:])
+            resultados.extend((ruta, error) for ruta in rutas[inicio + ventana:])
+            break
+    
+    return resultados
+
 def eliminar_archivos_ftp(conexion):
     """
     Elimina archivos remotos vía FTP más antiguos que los días especificados.
-    Usa una sola conexión para todas las rutas del servidor.
+    Usa una sola conexión para todas las rutas del servidor, o varias
+    conexiones de control en paralelo si la configuración fija conexiones_ftp.
     
     Args:
         conexion (dict): Configuración de conexión FTP
@@ -534,64 +1613,217 @@ def eliminar_archivos_ftp(conexion):
     Returns:
         tuple: (archivos_eliminados_totales, archivos_con_error_totales)
     """
+    import ftplib
+
     archivos_eliminados_totales = 0
     archivos_con_error_totales = 0
+    # Referencia común para el umbral de antigüedad de todas las rutas
+    ahora = time.time()
+    
+    # Muchos servidores limitan las conexiones por IP: por defecto sólo una
+    num_conexiones = conexion.get('conexiones_ftp', 1)
+    if not isinstance(num_conexiones, int) or isinstance(num_conexiones, bool) or num_conexiones < 1:
+        logging.warning(f"Valor no válido para conexiones_ftp en {conexion['alias']}: {num_conexiones!r}. Se usará una conexión")
+        num_conexiones = 1
+    
+    ventana = conexion.get('max_peticiones_ftp', VENTANA_FTP)
+    if not isinstance(ventana, int) or isinstance(ventana, bool) or ventana < 1:
+        logging.warning(f"Valor no válido para max_peticiones_ftp en {conexion['alias']}: {ventana!r}. Se usará {VENTANA_FTP}")
+        ventana = VENTANA_FTP
+    
+    def abrir_ftp():
+        cliente = ftplib.FTP()
+        cliente.connect(conexion['host'], conexion.get('puerto', 21), timeout=30)
+        cliente.login(conexion['usuario'], conexion['contrasena'])
+        # Sólo se usan el tipo y la fecha de MLSD: pedirlos una vez por conexión
+        # acorta cada línea del listado. Si el servidor no lo admite o responde
+        # con un código inesperado (p. ej. 202 o 4xx), se ignora
+        try:
+            cliente.sendcmd('OPTS MLST type;modify;')
+        except (ftplib.error_perm, ftplib.error_temp, ftplib.error_reply):
+            pass
+        return cliente
 
     try:
         logging.info(f"Conectando FTP a {conexion['host']}:{conexion.get('puerto', 21)} (alias: {conexion['alias']})")
-        ftp = ftplib.FTP()
-        ftp.connect(conexion['host'], conexion.get('puerto', 21), timeout=30)
-        ftp.login(conexion['usuario'], conexion['contrasena'])
+        # Conexiones de control: la primera es la principal y las adicionales
+        # atienden directorios distintos. Una conexión cerrada tras perder la
+        # sincronía de las respuestas se sustituye en su posición por otra nueva
+        conexiones_ftp = [abrir_ftp()]
+        for _ in range(num_conexiones - 1):
+            try:
+                conexiones_ftp.append(abrir_ftp())
+            except ftplib.all_errors as e:
+                logging.warning(f"No se pudo abrir otra conexión FTP a {conexion['host']}, se seguirá con {len(conexiones_ftp)}: {e}")
+                break
+        
+        # Se desactiva al primer rechazo del comando para no repetirlo en cada directorio
+        mlsd_disponible = True
         
-        def procesar_directorio_ftp(path, dias, mascara=None):
+        def listar_directorio_ftp(ftp, path):
             """
-            Función interna para procesar recursivamente un directorio FTP.
+            Lista un directorio FTP como tuplas (nombre, es_directorio, mtime).
+            
+            Con MLSD la fecha llega en el propio listado; si el servidor no lo
+            soporta se usa LIST y mtime queda en None para pedirla con MDTM.
             """
-            nonlocal archivos_eliminados_totales, archivos_con_error_totales
-            limite_tiempo = time.time() - (dias * 86400)
+            nonlocal mlsd_disponible
+            
+            if mlsd_disponible:
+                try:
+                    entradas = []
+                    for nombre, hechos in ftp.mlsd(path):
+                        tipo = hechos.get('type', '').lower()
+                        if tipo not in ('file', 'dir'):
+                            continue
+                        modify = hechos.get('modify')
+                        mtime = convertir_fecha_ftp(modify) if modify else None
+                        entradas.append((nombre, tipo == 'dir', mtime))
+                    return entradas
+                except ftplib.error_perm as e:
+                    if str(e)[:3] not in ('500', '501', '502', '504'):
+                        raise
+                    logging.info(f"Servidor FTP sin soporte MLSD, se usará LIST + MDTM: {e}")
+                    mlsd_disponible = False
+            
+            lineas = []
+            ftp.retrlines(f'LIST {path}', lineas.append)
+            
+            entradas = []
+            for linea in lineas:
+                # Línea estilo Unix: permisos, 7 campos (enlaces, dueño, grupo, tamaño
+                # y fecha en tres partes) y el nombre, que queda entero aunque tenga
+                # espacios. La cabecera "total N" tiene menos campos y se descarta
+                partes = linea.split(None, 8)
+                if len(partes) == 9:
+                    entradas.append((partes[8], partes[0][0] == 'd', None))
+            return entradas
+        
+        def procesar_directorio_ftp(ftp, path, limite_tiempo, coincide_mascara=None):
+            """
+            Función interna que limpia los archivos de un único directorio FTP.
+            
+            Returns:
+                tuple: (subdirectorios, eliminados, errores)
+            """
+            subdirectorios = []
+            caducados = []
+            eliminados = []
+            errores = 0
             
             try:
-                archivos = []
-                ftp.retrlines(f'LIST {path}', archivos.append)
-                
-                for linea in archivos:
-                    partes = linea.split()
-                    if len(partes) < 9:
-                        continue
-                    
-                    nombre = ' '.join(partes[8:])
+                for nombre, es_directorio, mtime in listar_directorio_ftp(ftp, path):
                     if nombre in ['.', '..']:
                         continue
                     
                     ruta_completa = f"{path}/{nombre}" if path else nombre
                     
-                    if linea.startswith('d'):
-                        procesar_directorio_ftp(ruta_completa, dias, mascara)
-                    else:
-                        if mascara:
-                            import fnmatch
-                            if not fnmatch.fnmatch(nombre, mascara):
-                                continue
-                                
+                    if es_directorio:
+                        subdirectorios.append(ruta_completa)
+                        continue
+                    
+                    if coincide_mascara and not coincide_mascara(nombre):
+                        continue
+                    
+                    if mtime is None:
                         try:
                             resp = ftp.sendcmd(f"MDTM {ruta_completa}")
-                            if resp.startswith('213'):
-                                mtime_str = resp[4:].strip()
-                                mtime = time.mktime(time.strptime(mtime_str, '%Y%m%d%H%M%S'))
-                                
-                                if mtime < limite_tiempo:
-                                    ftp.delete(ruta_completa)
-                                    archivos_eliminados_totales += 1
-                                    logging.info(f"ELIMINADO (FTP): {ruta_completa}")
+                            if not resp.startswith('213'):
+                                continue
+                            mtime = convertir_fecha_ftp(resp[4:].strip())
                         except ftplib.error_perm as e:
-                            logging.warning(f"No se pudo obtener fecha de {ruta_completa} (FTP): {e}")
-                        except Exception as e:
-                            archivos_con_error_totales += 1
-                            logging.error(f"ERROR procesando {ruta_completa} (FTP): {str(e)}")
+                            logging.warning("No se pudo obtener fecha de %s (FTP): %s", ruta_completa, e)
+                            continue
+                    
+                    if mtime < limite_tiempo:
+                        caducados.append(ruta_completa)
+                
+                for ruta_completa, error in eliminar_lote_ftp(ftp, caducados, ventana):
+                    if error is None:
+                        eliminados.append(ruta_completa)
+                    else:
+                        errores += 1
+                        logging.error("ERROR procesando %s (FTP): %s", ruta_completa, error)
                             
             except Exception as e:
-                archivos_con_error_totales += 1
+                errores += 1
                 logging.error(f"ERROR en directorio {path} (FTP): {str(e)}")
+                # Salvo un rechazo del servidor, el error puede dejar respuestas
+                # sin leer: la conexión se cierra para no interpretarlas después
+                if not isinstance(e, (ftplib.error_reply, ftplib.error_temp, ftplib.error_perm)):
+                    ftp.close()
+            
+            registrar_eliminados('FTP', eliminados)
+            return subdirectorios, len(eliminados), errores
+        
+        def recorrer_directorio_ftp(indices, ruta, limite_tiempo, coincide_mascara=None):
+            """
+            Función interna que recorre el árbol de una ruta.
+            
+            Los directorios pendientes forman una pila común: cada conexión de
+            conexiones_ftp indicada en `indices` (ya situada en la ruta) toma
+            uno, lo limpia y añade sus subdirectorios, hasta que no quedan
+            pendientes ni directorios en curso. Una conexión que se ha cerrado
+            por un error se vuelve a abrir; si no se puede, deja de participar.
+            Se eliminan los archivos modificados antes de limite_tiempo;
+            coincide_mascara es la máscara ya compilada con compilar_mascara.
+            
+            Returns:
+                tuple: (eliminados, errores)
+            """
+            pendientes = ['']
+            en_curso = 0
+            condicion = threading.Condition()
+            
+            def trabajador(indice):
+                nonlocal en_curso
+                eliminados = 0
+                errores = 0
+                
+                while True:
+                    cliente = conexiones_ftp[indice]
+                    if cliente.sock is None:
+                        try:
+                            cliente = conexiones_ftp[indice] = abrir_ftp()
+                            cliente.cwd(ruta)
+                            logging.info(f"  Reabierta una conexión FTP a {conexion['host']} tras un error")
+                        except ftplib.all_errors as e:
+                            logging.error(f"No se pudo reabrir la conexión FTP a {conexion['host']}: {e}")
+                            return eliminados, errores
+                    
+                    with condicion:
+                        while not pendientes and en_curso:
+                            condicion.wait()
+                        if not pendientes:
+                            return eliminados, errores
+                        path = pendientes.pop()
+                        en_curso += 1
+                    
+                    subdirectorios = []
+                    try:
+                        subdirectorios, eliminados_dir, errores_dir = procesar_directorio_ftp(
+                            cliente, path, limite_tiempo, coincide_mascara)
+                        eliminados += eliminados_dir
+                        errores += errores_dir
+                    finally:
+                        with condicion:
+                            pendientes.extend(subdirectorios)
+                            en_curso -= 1
+                            condicion.notify_all()
+            
+            if len(indices) == 1:
+                resultados = [trabajador(indices[0])]
+            else:
+                with ThreadPoolExecutor(max_workers=len(indices)) as executor:
+                    resultados = list(executor.map(trabajador, indices))
+            
+            eliminados = sum(r[0] for r in resultados)
+            errores = sum(r[1] for r in resultados)
+            # Sólo quedan pendientes si ninguna conexión pudo reabrirse
+            if pendientes:
+                logging.error(f"{len(pendientes)} directorios de {ruta} sin procesar: no queda ninguna conexión FTP disponible")
+                errores += len(pendientes)
+            return eliminados, errores
         
         for ruta_config in conexion['rutas']:
             ruta = ruta_config['ruta']
@@ -604,14 +1836,22 @@ def eliminar_archivos_ftp(conexion):
                 logging.info(f"  Procesando ruta FTP: {ruta} - {dias} días")
             
             try:
-                ftp.cwd(ruta)
-                archivos_antes = archivos_eliminados_totales
-                errores_antes = archivos_con_error_totales
-                
-                procesar_directorio_ftp('', dias, mascara)
+                indices = []
+                for indice, cliente in enumerate(conexiones_ftp):
+                    try:
+                        # Cerrada tras un error en la ruta anterior
+                        if cliente.sock is None:
+                            cliente = conexiones_ftp[indice] = abrir_ftp()
+                        cliente.cwd(ruta)
+                        indices.append(indice)
+                    except ftplib.all_errors as e:
+                        if indice == 0:
+                            raise
+                        logging.warning(f"Una conexión FTP adicional no pudo acceder a {ruta}: {e}")
                 
-                eliminados_ruta = archivos_eliminados_totales - archivos_antes
-                errores_ruta = archivos_con_error_totales - errores_antes
+                eliminados_ruta, errores_ruta = recorrer_directorio_ftp(indices, ruta, ahora - dias * 86400, compilar_mascara(mascara))
+                archivos_eliminados_totales += eliminados_ruta
+                archivos_con_error_totales += errores_ruta
                 
                 if mascara:
                     logging.info(f"  Resumen ruta {ruta} (máscara: '{mascara}'): {eliminados_ruta} eliminados, {errores_ruta} errores")
@@ -622,7 +1862,12 @@ def eliminar_archivos_ftp(conexion):
                 logging.error(f"La ruta no existe o no es accesible: {ruta} - Error: {e}")
                 archivos_con_error_totales += 1
         
-        ftp.quit()
+        for cliente in conexiones_ftp:
+            try:
+                if cliente.sock is not None:
+                    cliente.quit()
+            except ftplib.all_errors:
+                cliente.close()
         
     except ftplib.all_errors as e:
         logging.error(f"ERROR FTP: {str(e)}")
@@ -649,10 +1894,12 @@ def procesar_conexion(alias, conexion):
     try:
         if conexion['tipo'] == 'local':
             # Para local, procesamos cada ruta individualmente
-            archivos_eliminados_totales = 0
-            archivos_con_error_totales = 0
+            hilos = conexion.get('hilos_borrado')
+            if hilos is not None and (not isinstance(hilos, int) or isinstance(hilos, bool) or hilos < 1):
+                logging.warning(f"Valor no válido para hilos_borrado en {alias}: {hilos!r}. Se elegirá según el sistema de archivos")
+                hilos = None
             
-            for ruta_config in conexion['rutas']:
+            def procesar_ruta_local(ruta_config):
                 ruta = ruta_config['ruta']
                 dias = ruta_config['dias']
                 mascara = ruta_config.get('mascara')
@@ -662,16 +1909,16 @@ def procesar_conexion(alias, conexion):
                 else:
                     logging.info(f"  Ruta: {ruta} - {dias} días")
                     
-                eliminados, errores = eliminar_archivos_locales(ruta, dias, mascara)
-                archivos_eliminados_totales += eliminados
-                archivos_con_error_totales += errores
+                eliminados, errores = eliminar_archivos_locales(ruta, dias, mascara, hilos)
                 
                 if mascara:
-                    logging.info(f"  Resumen ruta (máscara: '{mascara}'): {eliminados} eliminados, {errores} errores")
+                    logging.info(f"  Resumen ruta {ruta} (máscara: '{mascara}'): {eliminados} eliminados, {errores} errores")
                 else:
-                    logging.info(f"  Resumen ruta: {eliminados} eliminados, {errores} errores")
+                    logging.info(f"  Resumen ruta {ruta}: {eliminados} eliminados, {errores} errores")
                 
-            return archivos_eliminados_totales, archivos_con_error_totales
+                return eliminados, errores
+            
+            return procesar_rutas(conexion['rutas'], procesar_ruta_local)
             
         elif conexion['tipo'] == 'ssh':
             return eliminar_archivos_ssh(conexion)
@@ -690,15 +1937,45 @@ def procesar_conexion(alias, conexion):
         logging.error(f"ERROR procesando conexión {alias}: {str(e)}")
         return 0, len(conexion['rutas'])
 
-def eliminar_archivos_antiguos(config_file, credenciales_file=None):
+def procesar_conexion_cronometrada(alias, conexion):
+    """
+    Ejecuta procesar_conexion midiendo su tiempo de procesamiento.
+    
+    Args:
+        alias (str): Alias de la conexión
+        conexion (dict): Configuración completa de la conexión
+        
+    Returns:
+        tuple: (archivos_eliminados, archivos_con_error, segundos)
+    """
+    tiempo_inicio = time.time()
+    eliminados, errores = procesar_conexion(alias, conexion)
+    return eliminados, errores, time.time() - tiempo_inicio
+
+def configurar_pila_hilos():
+    """
+    Reduce la pila reservada para los hilos de trabajo a TAMANO_PILA_HILOS.
+    
+    Con muchas conexiones y rutas en paralelo se crean cientos de hilos, y
+    en Linux cada uno reserva 8 MiB de pila por defecto. Los recorridos son
+    iterativos, así que basta con la pila que Windows da por defecto.
+    Afecta sólo a los hilos creados después de la llamada.
+    """
+    try:
+        threading.stack_size(TAMANO_PILA_HILOS)
+    except (ValueError, RuntimeError) as e:
+        logging.debug(f"No se pudo ajustar la pila de los hilos: {e}")
+
+def eliminar_archivos_antiguos(config_file, credenciales_file=None, verbose=False):
     """
     Función principal que elimina archivos antiguos basándose en la configuración.
     
     Args:
         config_file (str): Ruta al archivo de configuración
         credenciales_file (str): Ruta al archivo de credenciales (opcional)
+        verbose (bool): Registrar en nivel DEBUG (detalle por archivo)
     """
-    log_path = configurar_logging()
+    log_path = configurar_logging(verbose)
     logging.info("=" * 60)
     logging.info("INICIO del proceso de eliminación de archivos antiguos")
     logging.info(f"Log guardado en: {log_path}")
@@ -710,6 +1987,8 @@ def eliminar_archivos_antiguos(config_file, credenciales_file=None):
         
         # Combinar configuración con credenciales
         conexiones = combinar_configuracion(config, credenciales)
+        # Dos alias que apuntan a la misma ruta del mismo servidor la recorrerían dos veces
+        conexiones = descartar_rutas_duplicadas(conexiones)
         
         if not conexiones:
             logging.error("No hay conexiones válidas para procesar")
@@ -733,15 +2012,27 @@ def eliminar_archivos_antiguos(config_file, credenciales_file=None):
         archivos_con_error_totales = 0
         tiempo_inicio_total = time.time()
         
-        for alias, conexion in conexiones.items():
-            tiempo_inicio = time.time()
-            
-            eliminados, errores = procesar_conexion(alias, conexion)
-            archivos_eliminados_totales += eliminados
-            archivos_con_error_totales += errores
+        # Las conexiones son independientes y dominadas por la latencia de red,
+        # así que se procesan en paralelo
+        configurar_pila_hilos()
+        max_paralelas = config.get('max_conexiones_paralelas', MAX_CONEXIONES_PARALELAS)
+        if not isinstance(max_paralelas, int) or isinstance(max_paralelas, bool) or max_paralelas < 1:
+            logging.warning(f"Valor no válido para max_conexiones_paralelas: {max_paralelas!r}. Se usará {MAX_CONEXIONES_PARALELAS}")
+            max_paralelas = MAX_CONEXIONES_PARALELAS
+        
+        with ThreadPoolExecutor(max_workers=min(max_paralelas, len(conexiones))) as executor:
+            futuros = {
+                executor.submit(procesar_conexion_cronometrada, alias, conexion): alias
+                for alias, conexion in conexiones.items()
+            }
             
-            tiempo_procesamiento = time.time() - tiempo_inicio
-            logging.info(f"Resumen conexión {alias}: {eliminados} eliminados, {errores} errores - Tiempo: {tiempo_procesamiento:.2f}s")
+            for futuro in as_completed(futuros):
+                alias = futuros[futuro]
+                eliminados, errores, tiempo_procesamiento = futuro.result()
+                archivos_eliminados_totales += eliminados
+                archivos_con_error_totales += errores
+                
+                logging.info(f"Resumen conexión {alias}: {eliminados} eliminados, {errores} errores - Tiempo: {tiempo_procesamiento:.2f}s")
         
         tiempo_total = time.time() - tiempo_inicio_total
         logging.info("=" * 60)
@@ -755,25 +2046,32 @@ def eliminar_archivos_antiguos(config_file, credenciales_file=None):
     except Exception as e:
         logging.error(f"ERROR CRÍTICO en el proceso: {str(e)}")
         raise
+    finally:
+        cerrar_conexiones_ssh()
 
 def main():
     """
     Función principal que maneja la ejecución del script.
     """
-    if len(sys.argv) < 2:
-        print("Uso: python limpieza.py <ruta_al_archivo_configuracion> [ruta_al_archivo_credenciales]")
+    verbose = '--verbose' in sys.argv[1:]
+    argumentos = [arg for arg in sys.argv[1:] if arg != '--verbose']
+    
+    if not argumentos:
+        print("Uso: python limpieza.py [--verbose] <ruta_al_archivo_configuracion> [ruta_al_archivo_credenciales]")
         print("\nEjemplos:")
         print("  python limpieza.py config.json")
         print("  python limpieza.py config.json credenciales.json")
+        print("  python limpieza.py --verbose config.json")
         print("\nEl archivo config.json contiene las rutas y configuración.")
         print("El archivo credenciales.json contiene las credenciales de acceso.")
+        print("--verbose registra en el log cada archivo eliminado (nivel DEBUG).")
         sys.exit(1)
     
-    config_file = sys.argv[1]
-    credenciales_file = sys.argv[2] if len(sys.argv) > 2 else None
+    config_file = argumentos[0]
+    credenciales_file = argumentos[1] if len(argumentos) > 1 else None
     
     try:
-        eliminar_archivos_antiguos(config_file, credenciales_file)
+        eliminar_archivos_antiguos(config_file, credenciales_file, verbose)
     except Exception as e:
         logging.error(f"Error inesperado: {str(e)}")
         sys.exit(1)
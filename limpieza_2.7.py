@@ -1,4 +1,5 @@
 #!/usr/bin/env python
+# -*- coding: utf-8 -*-
 """
 Script para eliminar archivos antiguos basado en un archivo de configuración JSON.
 
@@ -36,19 +37,50 @@ Nota: Para conexiones SSH/SFTP se requiere la librería paramiko.
 """
 
 import os
+import posixpath
 import sys
 import time
 import datetime
+import calendar
 import logging
 import ftplib
 import fnmatch
+import re
 import json
+import stat
+import atexit
+import threading
 
 try:
     from urlparse import urlparse  # Python 2
 except ImportError:
     from urllib.parse import urlparse  # Python 3
 
+try:
+    from shlex import quote  # Python 3.3+
+except ImportError:
+    from pipes import quote  # Python 2
+
+try:
+    import Queue as queue  # Python 2
+except ImportError:
+    import queue  # Python 3
+
+try:
+    from os import scandir  # Python 3.5+
+except ImportError:
+    try:
+        from scandir import scandir  # Backport de PyPI para Python 2
+    except ImportError:
+        scandir = None
+
+# Conexiones procesadas a la vez si la configuración no fija max_conexiones_paralelas
+MAX_CONEXIONES_PARALELAS = 32
+# Entradas de un directorio a partir de las que se recorren en orden de inodo
+# (como fts en coreutils): en ext4/xfs el stat y el unlink recorren la tabla
+# de inodos en secuencia en lugar de saltar por el disco
+UMBRAL_ORDEN_INODO = 10000
+
 PARAMIKO_DISPONIBLE = False
 try:
     import paramiko
@@ -56,6 +88,71 @@ try:
 except ImportError:
     pass
 
+if sys.version_info[0] < 3:
+    def normalizar_cadenas(valor):
+        """
+        Convierte a str (UTF-8) las cadenas unicode que devuelve json en Python 2.
+        
+        Los mensajes de log son literales str con acentos; formatearlos con
+        rutas o alias unicode no ASCII lanzaría UnicodeEncodeError.
+        
+        Args:
+            valor: Objeto cargado del JSON
+            
+        Returns:
+            El mismo objeto con sus cadenas como str
+        """
+        if isinstance(valor, unicode):
+            return valor.encode('utf-8')
+        if isinstance(valor, dict):
+            return dict((normalizar_cadenas(k), normalizar_cadenas(v)) for k, v in valor.items())
+        if isinstance(valor, list):
+            return [normalizar_cadenas(elemento) for elemento in valor]
+        return valor
+else:
+    def normalizar_cadenas(valor):
+        """
+        En Python 3 json ya devuelve str: el objeto se devuelve sin recorrerlo.
+        """
+        return valor
+
+class ManejadorCola(logging.Handler):
+    """
+    Encola los registros para que los escriba un único hilo.
+    
+    Equivale a logging.handlers.QueueHandler, que no existe en Python 2.
+    """
+    def __init__(self, cola):
+        logging.Handler.__init__(self)
+        self.cola = cola
+    
+    def emit(self, record):
+        try:
+            # El mensaje (y la traza, si la hay) se resuelve en el hilo que registra
+            record.msg = self.format(record)
+            record.args = None
+            record.exc_info = None
+            record.exc_text = None
+            self.cola.put(record)
+        except Exception:
+            self.handleError(record)
+
+def escribir_registros(cola, manejadores):
+    """
+    Escribe en los manejadores los registros de la cola hasta recibir None.
+    
+    Args:
+        cola: Cola de registros que llena ManejadorCola
+        manejadores (list): Manejadores de archivo y consola
+    """
+    while True:
+        registro = cola.get()
+        if registro is None:
+            break
+        for manejador in manejadores:
+            if registro.levelno >= manejador.level:
+                manejador.handle(registro)
+
 def configurar_logging():
     """
     Configura el sistema de logging para el script.
@@ -73,7 +170,7 @@ def configurar_logging():
         try:
             os.makedirs(logs_dir)
         except OSError as e:
-            logging.error(f"Error creando directorio de logs: {e}")
+            logging.error("Error creando directorio de logs: {}".format(e))
             # Usar directorio actual si no se puede crear logs
             logs_dir = script_dir
     
@@ -93,18 +190,36 @@ def configurar_logging():
     formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s', 
                                   datefmt='%Y-%m-%d %H:%M:%S')
     
+    manejadores = []
+    
     # Handler para archivo
     try:
         file_handler = logging.FileHandler(log_path)
         file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        manejadores.append(file_handler)
     except Exception as e:
         print("Error creando archivo de log: {}".format(e))
     
     # Handler para consola
     console_handler = logging.StreamHandler(sys.stdout)
     console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    manejadores.append(console_handler)
+    
+    # Los hilos de borrado solo encolan el registro; la escritura a archivo y
+    # consola la hace un hilo aparte, fuera del bucle de borrado
+    cola = queue.Queue()
+    escritor = threading.Thread(target=escribir_registros, args=(cola, manejadores))
+    escritor.daemon = True
+    escritor.start()
+    
+    def detener_escritor():
+        cola.put(None)
+        escritor.join()
+    
+    # Se registra después de importar logging, así que atexit lo ejecuta antes
+    # que logging.shutdown y los registros pendientes se escriben antes de cerrar
+    atexit.register(detener_escritor)
+    logger.addHandler(ManejadorCola(cola))
     
     return log_path
 
@@ -119,9 +234,10 @@ def cargar_configuracion(config_file):
         dict: Configuración cargada
     """
     try:
-        # Python 2.x necesita abrir el archivo sin encoding específico
-        with open(config_file, 'r') as f:
-            config = json.load(f)
+        # Lectura binaria y decodificación explícita: mismo resultado en
+        # Python 2 y 3, sin depender de la codificación del sistema
+        with open(config_file, 'rb') as f:
+            config = normalizar_cadenas(json.loads(f.read().decode('utf-8')))
         
         logging.info("Configuración cargada desde: {}".format(config_file))
         return config
@@ -165,8 +281,8 @@ def cargar_credenciales(credenciales_file=None):
             return {}
     
     try:
-        with open(credenciales_file, 'r') as f:
-            credenciales = json.load(f)
+        with open(credenciales_file, 'rb') as f:
+            credenciales = normalizar_cadenas(json.loads(f.read().decode('utf-8')))
         
         logging.info("Credenciales cargadas desde: {}".format(credenciales_file))
         return credenciales
@@ -224,6 +340,73 @@ def combinar_configuracion(config, credenciales):
     
     return conexiones_combinadas
 
+def descartar_rutas_duplicadas(conexiones):
+    """
+    Quita las rutas que otra entrada de la configuración ya limpia.
+    
+    Dos rutas se consideran la misma si coinciden el tipo de conexión, el
+    servidor, el usuario, el uso de sudo, la ruta normalizada y la máscara.
+    De cada grupo se conserva la de menos días, que elimina todo lo que
+    eliminarían las demás. Las conexiones que se quedan sin rutas se omiten.
+    
+    Args:
+        conexiones (dict): Conexiones combinadas por alias
+        
+    Returns:
+        dict: Conexiones sin las rutas duplicadas
+    """
+    # Por clave de ruta: (días, alias, índice) de la que se conserva
+    conservadas = {}
+    claves = {}
+    
+    for alias, conexion in conexiones.items():
+        rutas = conexion.get('rutas')
+        if not isinstance(rutas, list):
+            continue
+        tipo = conexion.get('tipo')
+        
+        for indice, ruta_config in enumerate(rutas):
+            ruta = ruta_config.get('ruta') if isinstance(ruta_config, dict) else None
+            dias = ruta_config.get('dias') if isinstance(ruta_config, dict) else None
+            if not isinstance(ruta, str) or not isinstance(dias, (int, float)) or isinstance(dias, bool):
+                continue
+            
+            if tipo == 'local':
+                clave = (tipo, None, None, None, False, os.path.abspath(ruta), ruta_config.get('mascara'))
+            else:
+                clave = (tipo, conexion.get('host'), conexion.get('puerto'), conexion.get('usuario'),
+                         bool(conexion.get('necesita_sudo', False)), posixpath.normpath(ruta), ruta_config.get('mascara'))
+            claves[(alias, indice)] = clave
+            
+            if clave not in conservadas or dias < conservadas[clave][0]:
+                conservadas[clave] = (dias, alias, indice)
+    
+    resultado = {}
+    for alias, conexion in conexiones.items():
+        rutas = conexion.get('rutas')
+        if not isinstance(rutas, list):
+            resultado[alias] = conexion
+            continue
+        
+        rutas_conservadas = []
+        for indice, ruta_config in enumerate(rutas):
+            clave = claves.get((alias, indice))
+            if clave is None or conservadas[clave][1:] == (alias, indice):
+                rutas_conservadas.append(ruta_config)
+                continue
+            dias, alias_conservado, _ = conservadas[clave]
+            logging.info("Ruta duplicada omitida en {}: {} ({} días), ya la limpia {} con {} días".format(
+                alias, ruta_config['ruta'], ruta_config['dias'], alias_conservado, dias))
+        
+        if rutas_conservadas:
+            resultado[alias] = dict(conexion, rutas=rutas_conservadas)
+        elif rutas:
+            logging.info("Conexión {} omitida: todas sus rutas las limpian otras conexiones".format(alias))
+        else:
+            resultado[alias] = conexion
+    
+    return resultado
+
 def verificar_dependencias(conexiones):
     """
     Verifica que las dependencias necesarias estén disponibles según la configuración.
@@ -247,6 +430,45 @@ def verificar_dependencias(conexiones):
     
     return True
 
+def recorrer_archivos_locales(ruta_base):
+    """
+    Recorre recursivamente una ruta local devolviendo sus archivos.
+    
+    Con scandir la fecha se obtiene del propio DirEntry, sin construir la
+    ruta ni repetir llamadas al sistema; sin él se usa os.walk.
+    
+    Args:
+        ruta_base (str): Ruta local del directorio
+        
+    Yields:
+        tuple: (nombre, ruta_completa, entrada), con entrada None si se usa os.walk
+    """
+    if scandir is None:
+        for root, dirs, files in os.walk(ruta_base):
+            for nombre in files:
+                yield nombre, os.path.join(root, nombre), None
+        return
+    
+    pendientes = [ruta_base]
+    while pendientes:
+        directorio = pendientes.pop()
+        try:
+            entradas = list(scandir(directorio))
+        except OSError:
+            # Igual que os.walk, los directorios ilegibles se omiten
+            continue
+        if len(entradas) >= UMBRAL_ORDEN_INODO:
+            # El inodo llega con readdir: ordenar no cuesta llamadas al sistema
+            entradas.sort(key=lambda entrada: entrada.inode())
+        
+        for entrada in entradas:
+            # Igual que os.walk: no se siguen enlaces a directorios
+            if entrada.is_dir():
+                if not entrada.is_symlink():
+                    pendientes.append(entrada.path)
+                continue
+            yield entrada.name, entrada.path, entrada
+
 def eliminar_archivos_locales(ruta_base, dias, mascara=None):
     """
     Elimina archivos locales más antiguos que los días especificados.
@@ -265,29 +487,30 @@ def eliminar_archivos_locales(ruta_base, dias, mascara=None):
     archivos_procesados = 0
 
     try:
-        for root, dirs, files in os.walk(ruta_base):
-            for file in files:
-                
-                if mascara and not fnmatch.fnmatch(file, mascara):
-                    continue
-                
-                ruta_completa = os.path.join(root, file)
-                archivos_procesados += 1
+        for nombre, ruta_completa, entrada in recorrer_archivos_locales(ruta_base):
+            
+            if mascara and not fnmatch.fnmatch(nombre, mascara):
+                continue
+            
+            archivos_procesados += 1
 
-                try:
+            try:
+                if entrada is not None:
+                    mtime = entrada.stat().st_mtime
+                else:
                     mtime = os.path.getmtime(ruta_completa)
 
-                    if mtime < limite_tiempo:
-                        try:
-                            os.remove(ruta_completa)
-                            archivos_eliminados += 1
-                            logging.info("ELIMINADO (local): {}".format(ruta_completa))
-                        except OSError as e:
-                            archivos_con_error += 1
-                            logging.error("ERROR eliminando {}: {}".format(ruta_completa, str(e)))
-                except OSError as e:
-                    archivos_con_error += 1
-                    logging.error("ERROR accediendo a {}: {}".format(ruta_completa, str(e)))
+                if mtime < limite_tiempo:
+                    try:
+                        os.remove(ruta_completa)
+                        archivos_eliminados += 1
+                        logging.info("ELIMINADO (local): %s", ruta_completa)
+                    except OSError as e:
+                        archivos_con_error += 1
+                        logging.error("ERROR eliminando %s: %s", ruta_completa, e)
+            except OSError as e:
+                archivos_con_error += 1
+                logging.error("ERROR accediendo a %s: %s", ruta_completa, e)
         
         if mascara:
             logging.info("Resumen LOCAL {} (máscara: '{}'): {} procesados, {} eliminados, {} errores".format(
@@ -316,14 +539,23 @@ def ejecutar_comando_ssh(cliente_ssh, comando, descripcion):
     """
     try:
         stdin, stdout, stderr = cliente_ssh.exec_command(comando)
-        exit_status = stdout.channel.recv_exit_status()
+        
+        # Las salidas se leen antes de esperar el estado y stderr en otro hilo:
+        # si una de las dos llena la ventana del canal sin leerse, el comando
+        # remoto se bloquea y nunca termina
+        bloques_error = []
+        lector_errores = threading.Thread(target=lambda: bloques_error.append(stderr.read()))
+        lector_errores.daemon = True
+        lector_errores.start()
         salida = stdout.read().decode('utf-8').strip()
-        errores = stderr.read().decode('utf-8').strip()
+        lector_errores.join()
+        errores = b''.join(bloques_error).decode('utf-8').strip()
+        exit_status = stdout.channel.recv_exit_status()
         
         if exit_status != 0:
-            logging.warning("Comando '{}' falló (estado {}): {}".format(descripcion, exit_status, errores))
+            logging.warning(u"Comando '%s' falló (estado %s): %s", descripcion, exit_status, errores)
         else:
-            logging.debug("Comando '{}' ejecutado exitosamente".format(descripcion))
+            logging.debug("Comando '%s' ejecutado exitosamente", descripcion)
             
         return salida, errores, exit_status
         
@@ -331,6 +563,93 @@ def ejecutar_comando_ssh(cliente_ssh, comando, descripcion):
         logging.error("Error ejecutando comando '{}': {}".format(descripcion, str(e)))
         return "", str(e), 1
 
+# Comillas con las que find cita rutas y predicados en sus mensajes de error
+COMILLAS_FIND = u"`'\"\u2018\u2019\u00ab\u00bb"
+
+def find_rechaza_predicado(errores, predicado):
+    """
+    Indica si find rechazó un predicado (p. ej. -delete) por no admitirlo.
+    
+    Sólo cuentan los mensajes del propio find (líneas "find: ...") que
+    nombran el predicado como argumento suelto. Las rutas se descartan antes:
+    un error de permisos en un archivo llamado "x-delete" no debe hacer
+    pensar que find no admite -delete.
+    
+    Args:
+        errores (unicode): Salida de errores de find
+        predicado (str): Predicado con su guion, p. ej. '-delete'
+        
+    Returns:
+        bool: True si algún mensaje de find rechaza el predicado
+    """
+    comillas = re.escape(COMILLAS_FIND)
+    patron = re.compile(u"(?:^|[\\s:{0}]){1}(?=$|[\\s:,{0}])".format(comillas, re.escape(predicado)), re.UNICODE)
+    ruta_citada = re.compile(u"[{0}][^{0}]*/[^{0}]*[{0}]".format(comillas), re.UNICODE)
+    
+    for linea in errores.split(u'\n'):
+        linea = linea.strip()
+        if not linea.startswith(u'find:'):
+            continue
+        # Las rutas buscadas son absolutas: todas llevan '/', que no aparece
+        # en ningún predicado. Una ruta sin comillas justo tras "find:" es un
+        # error sobre un archivo, no sobre el comando
+        mensaje = ruta_citada.sub(u'', linea[len(u'find:'):]).strip()
+        if not mensaje.startswith(u'/') and patron.search(mensaje):
+            return True
+    return False
+
+def eliminar_lista_ssh(cliente_ssh, archivos, comando_sudo=""):
+    """
+    Elimina una lista de archivos remotos con un único proceso en el servidor.
+    
+    Las rutas se envían separadas por NUL por la entrada de un xargs -0, de
+    modo que no hace falta entrecomillarlas ni abrir un comando por archivo.
+    El servidor devuelve, una por línea, las rutas que pudo eliminar.
+    
+    Args:
+        cliente_ssh: Cliente SSH de Paramiko
+        archivos (list): Rutas remotas a eliminar
+        comando_sudo (str): Prefijo "sudo " o cadena vacía
+        
+    Returns:
+        tuple: (eliminados, mensajes) con las rutas eliminadas y las líneas
+            de error del servidor
+    """
+    script = 'for f; do rm -f "$f" && printf "%s\\n" "$f"; done'
+    canal = cliente_ssh.get_transport().open_session()
+    canal.set_combine_stderr(True)
+    canal.exec_command("{}xargs -0 sh -c '{}' sh".format(comando_sudo, script))
+    
+    datos = b'\0'.join(archivo.encode('utf-8') for archivo in archivos)
+    
+    def enviar():
+        # En otro hilo: si la salida llena la ventana del canal el servidor deja
+        # de leer la entrada hasta que se consuma
+        try:
+            canal.sendall(datos)
+        finally:
+            canal.shutdown_write()
+    
+    emisor = threading.Thread(target=enviar)
+    emisor.daemon = True
+    emisor.start()
+    salida = canal.makefile('rb').read().decode('utf-8', 'replace')
+    emisor.join()
+    canal.recv_exit_status()
+    canal.close()
+    
+    pendientes = set(archivos)
+    eliminados = []
+    mensajes = []
+    for linea in salida.split('\n'):
+        if linea in pendientes:
+            pendientes.discard(linea)
+            eliminados.append(linea)
+        elif linea.strip():
+            mensajes.append(linea)
+    
+    return eliminados, mensajes
+
 def eliminar_archivos_ssh(conexion):
     """
     Elimina archivos remotos vía SSH más antiguos que los días especificados.
@@ -365,6 +684,10 @@ def eliminar_archivos_ssh(conexion):
             timeout=30
         )
         
+        # Pasa a False si el find del servidor no admite -delete (p. ej. find
+        # POSIX estricto): se deja de intentar en el resto de rutas
+        delete_disponible = True
+        
         for ruta_config in conexion['rutas']:
             ruta = ruta_config['ruta']
             dias = ruta_config['dias']
@@ -375,60 +698,73 @@ def eliminar_archivos_ssh(conexion):
             else:
                 logging.info("  Procesando ruta SSH: {} - {} días".format(ruta, dias))
             
-            comando_test = "{}ls {}".format(comando_sudo, ruta)
-            salida, errores, estado = ejecutar_comando_ssh(cliente_ssh, comando_test, "verificar ruta {}".format(ruta))
+            # test -d y find en un mismo comando: si la ruta no existe find no
+            # llega a ejecutarse y no hay salida alguna
+            # Ruta y máscara entrecomilladas para el shell remoto: un nombre con
+            # comillas o espacios no rompe el comando ni inyecta otro
+            filtro_nombre = " -name {}".format(quote(mascara)) if mascara else ""
+            comando_find = "{0}test -d {1} && {0}find {1} -type f{2} -mtime +{3}".format(
+                comando_sudo, quote(ruta), filtro_nombre, dias)
             
-            if estado != 0:
-                logging.error("No se puede acceder a la ruta {}: {}".format(ruta, errores))
+            if delete_disponible:
+                # find elimina y lista lo eliminado: una sola ida y vuelta por ruta
+                salida, errores, estado = ejecutar_comando_ssh(
+                    cliente_ssh, comando_find + " -delete -print", "eliminar archivos en {}".format(ruta))
+                
+                if estado != 0 and not salida and find_rechaza_predicado(errores, '-delete'):
+                    logging.info("  find sin soporte de -delete en {}, se eliminará con xargs: {}".format(
+                        conexion['host'], errores))
+                    delete_disponible = False
+            
+            if not delete_disponible:
+                salida, errores, estado = ejecutar_comando_ssh(
+                    cliente_ssh, comando_find + " -print", "buscar archivos en {}".format(ruta))
+            
+            if estado != 0 and not salida and not errores:
+                logging.error("No se puede acceder a la ruta {}: no existe o no es un directorio".format(ruta))
                 archivos_con_error_totales += 1
                 continue
             
-            if mascara:
-                comando_find = "{}find {} -type f -name '{}' -mtime +{} -print".format(comando_sudo, ruta, mascara, dias)
-            else:
-                comando_find = "{}find {} -type f -mtime +{} -print".format(comando_sudo, ruta, dias)
-                
-            salida, errores, estado = ejecutar_comando_ssh(cliente_ssh, comando_find, "buscar archivos en {}".format(ruta))
-            
-            if estado != 0 and "No such file or directory" not in errores:
-                logging.error("Error buscando archivos en {}: {}".format(ruta, errores))
+            archivos = [archivo for archivo in salida.split('\n') if archivo.strip()]
             
-            archivos_a_eliminar = [archivo for archivo in salida.split('\n') if archivo.strip()]
+            # Cada línea de error de find corresponde a un archivo o directorio
+            # que no se pudo tratar; uno desaparecido entretanto no es un error
+            mensajes = []
+            if estado != 0:
+                mensajes = [linea for linea in errores.split('\n')
+                            if linea.strip() and "No such file or directory" not in linea]
+            archivos_con_error_ruta = len(mensajes)
             
-            if not archivos_a_eliminar:
+            if not archivos and not mensajes:
                 if mascara:
                     logging.info("No se encontraron archivos con máscara '{}' para eliminar en {} (más antiguos de {} días)".format(mascara, ruta, dias))
                 else:
                     logging.info("No se encontraron archivos para eliminar en {} (más antiguos de {} días)".format(ruta, dias))
                 continue
             
-            logging.info("Encontrados {} archivos para eliminar en {}".format(len(archivos_a_eliminar), ruta))
-            
-            archivos_eliminados_ruta = 0
-            archivos_con_error_ruta = 0
-            
-            for archivo in archivos_a_eliminar:
-                archivo = archivo.strip()
-                if not archivo:
-                    continue
-                    
+            if delete_disponible:
+                eliminados = archivos
+            elif archivos:
+                logging.info("Encontrados {} archivos para eliminar en {}".format(len(archivos), ruta))
+                
+                # Un solo proceso remoto para toda la lista en lugar de un rm por archivo
                 try:
-                    comando_eliminar = "{}rm -f '{}'".format(comando_sudo, archivo)
-                    salida, errores, estado = ejecutar_comando_ssh(cliente_ssh, comando_eliminar, "eliminar {}".format(archivo))
-                    
-                    if estado == 0:
-                        archivos_eliminados_ruta += 1
-                        archivos_eliminados_totales += 1
-                        logging.info("ELIMINADO (SSH): {}".format(archivo))
-                    else:
-                        archivos_con_error_ruta += 1
-                        archivos_con_error_totales += 1
-                        logging.error("ERROR eliminando {}: {}".format(archivo, errores))
-                        
+                    eliminados, mensajes_rm = eliminar_lista_ssh(cliente_ssh, archivos, comando_sudo)
                 except Exception as e:
-                    archivos_con_error_ruta += 1
-                    archivos_con_error_totales += 1
-                    logging.error("ERROR procesando {}: {}".format(archivo, str(e)))
+                    eliminados, mensajes_rm = [], [str(e)]
+                mensajes.extend(mensajes_rm)
+                archivos_con_error_ruta += len(archivos) - len(eliminados)
+            else:
+                eliminados = []
+            
+            for archivo in eliminados:
+                logging.info("ELIMINADO (SSH): %s", archivo)
+            for mensaje in mensajes:
+                logging.error("ERROR eliminando en %s: %s", ruta, mensaje)
+            
+            archivos_eliminados_ruta = len(eliminados)
+            archivos_eliminados_totales += archivos_eliminados_ruta
+            archivos_con_error_totales += archivos_con_error_ruta
             
             if mascara:
                 logging.info("  Resumen ruta {} (máscara: '{}'): {} eliminados, {} errores".format(
@@ -453,6 +789,81 @@ def eliminar_archivos_ssh(conexion):
 
     return archivos_eliminados_totales, archivos_con_error_totales
 
+class RespuestasSFTP(object):
+    """
+    Recoge las respuestas de peticiones SFTP asíncronas en el orden en que lleguen.
+    """
+    def __init__(self):
+        self.respuestas = {}
+    
+    def _async_response(self, tipo, mensaje, numero):
+        self.respuestas[numero] = (tipo, mensaje)
+
+def eliminar_lote_sftp(sftp, rutas, ventana=32):
+    """
+    Elimina varios archivos por SFTP encadenando las peticiones.
+    
+    En lugar de esperar la respuesta de cada SSH_FXP_REMOVE antes de enviar
+    el siguiente, mantiene hasta `ventana` peticiones en vuelo sobre el
+    mismo canal. Si la versión de paramiko no expone la API asíncrona se
+    eliminan de uno en uno. Si el canal falla a mitad del lote no se lanza
+    el error: las rutas sin respuesta se devuelven con él.
+    
+    Args:
+        sftp: Cliente SFTP de Paramiko
+        rutas (list): Rutas remotas a eliminar
+        ventana (int): Máximo de peticiones sin respuesta
+        
+    Returns:
+        list: Tuplas (ruta, error), con error None si se eliminó
+    """
+    resultados = []
+    
+    if not hasattr(sftp, '_async_request'):
+        for ruta in rutas:
+            try:
+                sftp.remove(ruta)
+                resultados.append((ruta, None))
+            except Exception as e:
+                resultados.append((ruta, e))
+        return resultados
+    
+    respuestas = RespuestasSFTP()
+    pendientes = {}
+    
+    def recoger_respuesta():
+        sftp._read_response()
+        for numero, (tipo, mensaje) in respuestas.respuestas.items():
+            ruta = pendientes.pop(numero)
+            try:
+                if tipo != paramiko.sftp.CMD_STATUS:
+                    raise paramiko.SFTPError("Respuesta inesperada al eliminar (tipo {})".format(tipo))
+                # Lanza IOError con el errno adecuado si el servidor devolvió error
+                sftp._convert_status(mensaje)
+                resultados.append((ruta, None))
+            except Exception as e:
+                resultados.append((ruta, e))
+        respuestas.respuestas.clear()
+    
+    enviadas = 0
+    try:
+        for ruta in rutas:
+            numero = sftp._async_request(respuestas, paramiko.sftp.CMD_REMOVE, sftp._adjust_cwd(ruta))
+            pendientes[numero] = ruta
+            enviadas += 1
+            while len(pendientes) >= ventana:
+                recoger_respuesta()
+        
+        while pendientes:
+            recoger_respuesta()
+    except Exception as e:
+        # El canal ha fallado (p. ej. por timeout): se conservan los resultados
+        # ya recibidos y las peticiones sin respuesta o sin enviar se dan por fallidas
+        resultados.extend((ruta, e) for ruta in pendientes.values())
+        resultados.extend((ruta, e) for ruta in rutas[enviadas:])
+    
+    return resultados
+
 def eliminar_archivos_sftp(conexion):
     """
     Elimina archivos remotos vía SFTP más antiguos que los días especificados.
@@ -470,6 +881,11 @@ def eliminar_archivos_sftp(conexion):
 
     archivos_eliminados_totales = 0
     archivos_con_error_totales = 0
+    # Referencia común para el umbral de antigüedad de todas las rutas
+    ahora = time.time()
+    # Se consulta una vez: en Python 2 isEnabledFor recorre la jerarquía de
+    # loggers en cada llamada y el nivel no cambia durante la ejecución
+    detallado = logging.getLogger().isEnabledFor(logging.DEBUG)
 
     try:
         # Conectar al servidor SFTP (una sola vez)
@@ -477,49 +893,87 @@ def eliminar_archivos_sftp(conexion):
         transporte.connect(username=conexion['usuario'], password=conexion['contrasena'])
         
         sftp = paramiko.SFTPClient.from_transport(transporte)
+        # Un servidor que deja de responder produce un error en lugar de bloquear
+        sftp.get_channel().settimeout(30)
         logging.info("Conectado SFTP a {}:{} (alias: {})".format(
             conexion['host'], conexion.get('puerto', 22), conexion['alias']))
         
-        # Usar listas para simular "nonlocal" en Python 2
-        contadores = [archivos_eliminados_totales, archivos_con_error_totales]
+        def tipo_entrada_sftp(atributo, ruta_completa):
+            """
+            Función interna que clasifica una entrada del listado.
+            
+            El tipo llega en los atributos del propio listado (sin seguir
+            enlaces); sólo si el servidor no lo envía se comprueba listando la entrada.
+            
+            Returns:
+                str: 'directorio', 'archivo' u 'otro' (enlaces, sockets, FIFOs...)
+            """
+            if atributo.st_mode is not None:
+                if stat.S_ISDIR(atributo.st_mode):
+                    return 'directorio'
+                return 'archivo' if stat.S_ISREG(atributo.st_mode) else 'otro'
+            try:
+                sftp.listdir(ruta_completa)
+                return 'directorio'
+            except Exception:
+                return 'archivo'
         
-        def procesar_directorio_sftp(ruta_remota, dias, mascara=None):
+        def procesar_directorio_sftp(ruta_remota, limite_tiempo, mascara=None):
             """
             Función interna para procesar recursivamente un directorio SFTP.
+            
+            Se eliminan los archivos modificados antes de limite_tiempo.
+            
+            Returns:
+                tuple: (eliminados, errores) del directorio y sus subdirectorios
             """
-            limite_tiempo = time.time() - (dias * 86400)
+            eliminados = 0
+            errores = 0
+            caducados = []
             
+            # El prefijo se normaliza una vez por directorio, no por entrada
+            prefijo = (ruta_remota + '/').replace('//', '/')
             try:
                 for atributo in sftp.listdir_attr(ruta_remota):
-                    ruta_completa = "{}/{}".format(ruta_remota, atributo.filename).replace('//', '/')
+                    ruta_completa = prefijo + atributo.filename
                     
                     if atributo.filename in ['.', '..']:
                         continue
                     
-                    try:
-                        sftp.listdir(ruta_completa)
-                        procesar_directorio_sftp(ruta_completa, dias, mascara)
-                    except:
-                        if mascara:
-                            if not fnmatch.fnmatch(atributo.filename, mascara):
-                                continue
-                                
-                        try:
-                            mtime = atributo.st_mtime
+                    tipo = tipo_entrada_sftp(atributo, ruta_completa)
+                    if tipo == 'directorio':
+                        eliminados_sub, errores_sub = procesar_directorio_sftp(ruta_completa, limite_tiempo, mascara)
+                        eliminados += eliminados_sub
+                        errores += errores_sub
+                        continue
+                    if tipo != 'archivo':
+                        # Igual que find -type f en la rama SSH
+                        continue
+                    
+                    if mascara:
+                        if not fnmatch.fnmatch(atributo.filename, mascara):
+                            continue
                             
-                            if mtime < limite_tiempo:
-                                sftp.remove(ruta_completa)
-                                contadores[0] += 1
-                                logging.info("ELIMINADO (SFTP): {}".format(ruta_completa))
-                            else:
-                                logging.debug("Conservado (SFTP): {}".format(ruta_completa))
-                        except Exception as e:
-                            contadores[1] += 1
-                            logging.error("ERROR procesando {} (SFTP): {}".format(ruta_completa, str(e)))
+                    if atributo.st_mtime < limite_tiempo:
+                        caducados.append(ruta_completa)
+                    elif detallado:
+                        logging.debug("Conservado (SFTP): %s", ruta_completa)
+                
+                # Los archivos caducados del directorio se eliminan con las
+                # peticiones encadenadas, sin esperar cada respuesta
+                for ruta_completa, error in eliminar_lote_sftp(sftp, caducados):
+                    if error is None:
+                        eliminados += 1
+                        logging.info("ELIMINADO (SFTP): %s", ruta_completa)
+                    else:
+                        errores += 1
+                        logging.error("ERROR procesando %s (SFTP): %s", ruta_completa, error)
                             
             except Exception as e:
-                contadores[1] += 1
+                errores += 1
                 logging.error("ERROR en directorio {} (SFTP): {}".format(ruta_remota, str(e)))
+            
+            return eliminados, errores
         
         for ruta_config in conexion['rutas']:
             ruta = ruta_config['ruta']
@@ -535,13 +989,9 @@ def eliminar_archivos_sftp(conexion):
                 sftp.listdir(ruta)
                 logging.info("  Ruta verificada: {}".format(ruta))
                 
-                archivos_antes = contadores[0]
-                errores_antes = contadores[1]
-                
-                procesar_directorio_sftp(ruta, dias, mascara)
-                
-                eliminados_ruta = contadores[0] - archivos_antes
-                errores_ruta = contadores[1] - errores_antes
+                eliminados_ruta, errores_ruta = procesar_directorio_sftp(ruta, ahora - dias * 86400, mascara)
+                archivos_eliminados_totales += eliminados_ruta
+                archivos_con_error_totales += errores_ruta
                 
                 if mascara:
                     logging.info("  Resumen ruta {} (máscara: '{}'): {} eliminados, {} errores".format(
@@ -552,10 +1002,7 @@ def eliminar_archivos_sftp(conexion):
                 
             except Exception as e:
                 logging.error("La ruta no existe o no es accesible: {} - Error: {}".format(ruta, e))
-                contadores[1] += 1
-        
-        archivos_eliminados_totales = contadores[0]
-        archivos_con_error_totales = contadores[1]
+                archivos_con_error_totales += 1
         
         sftp.close()
         transporte.close()
@@ -571,6 +1018,114 @@ def eliminar_archivos_sftp(conexion):
 
     return archivos_eliminados_totales, archivos_con_error_totales
 
+def convertir_fecha_ftp(valor):
+    """
+    Convierte una fecha FTP (MLSD 'modify' o respuesta MDTM) a timestamp.
+    
+    Args:
+        valor (str): Fecha en formato YYYYMMDDHHMMSS[.sss], en UTC (RFC 3659)
+        
+    Returns:
+        float: Timestamp Unix equivalente
+    """
+    return calendar.timegm(time.strptime(valor[:14], '%Y%m%d%H%M%S'))
+
+def listar_directorio_mlsd(ftp, path):
+    """
+    Lista un directorio FTP con MLSD como tuplas (nombre, es_directorio, mtime).
+    
+    ftplib sólo incluye mlsd() a partir de Python 3.3, así que la respuesta
+    se interpreta aquí: cada línea es "hecho=valor;...; nombre".
+    
+    Args:
+        ftp: Conexión ftplib.FTP
+        path (str): Directorio a listar ('' para el actual)
+        
+    Returns:
+        list: Entradas de tipo archivo o directorio
+    """
+    lineas = []
+    ftp.retrlines('MLSD {}'.format(path) if path else 'MLSD', lineas.append)
+    
+    entradas = []
+    for linea in lineas:
+        hechos_texto, _, nombre = linea.partition(' ')
+        hechos = {}
+        for hecho in hechos_texto.rstrip(';').split(';'):
+            clave, _, valor = hecho.partition('=')
+            hechos[clave.lower()] = valor
+        
+        tipo = hechos.get('type', '').lower()
+        if tipo not in ('file', 'dir'):
+            continue
+        modify = hechos.get('modify')
+        mtime = convertir_fecha_ftp(modify) if modify else None
+        entradas.append((nombre, tipo == 'dir', mtime))
+    return entradas
+
+# Órdenes DELE que se envían seguidas por una conexión de control FTP, salvo
+# que la conexión fije max_peticiones_ftp (con 1 se eliminan de una en una)
+VENTANA_FTP = 32
+
+def eliminar_lote_ftp(ftp, rutas, ventana=VENTANA_FTP):
+    """
+    Elimina varios archivos por FTP encadenando las órdenes DELE.
+    
+    En lugar de esperar la respuesta de cada DELE antes de enviar la
+    siguiente, escribe hasta `ventana` órdenes seguidas en la conexión de
+    control y después lee sus respuestas, que el servidor devuelve en orden.
+    
+    Si la conexión falla a mitad de una ventana (timeout, cierre, respuesta
+    ilegible) quedan respuestas sin leer: se cierra la conexión, que no debe
+    reutilizarse sin reconectar (ftp.sock queda en None), y las rutas sin
+    respuesta o sin enviar se devuelven con el error.
+    
+    Args:
+        ftp: Conexión ftplib.FTP
+        rutas (list): Rutas remotas a eliminar
+        ventana (int): Máximo de órdenes sin respuesta
+        
+    Returns:
+        list: Tuplas (ruta, error), con error None si se eliminó
+    """
+    resultados = []
+    
+    for inicio in range(0, len(rutas), ventana):
+        enviadas = []
+        for ruta in rutas[inicio:inicio + ventana]:
+            # Un salto de línea partiría la orden en dos y desordenaría las respuestas
+            if '\r' in ruta or '\n' in ruta:
+                resultados.append((ruta, ValueError("la ruta contiene saltos de línea")))
+            else:
+                enviadas.append(ruta)
+        if not enviadas:
+            continue
+        
+        ordenes = ''.join("DELE " + ruta + "\r\n" for ruta in enviadas)
+        # En Python 2 las rutas ya son bytes; en Python 3 se codifican como ftplib
+        if not isinstance(ordenes, bytes):
+            ordenes = ordenes.encode(getattr(ftp, 'encoding', 'latin-1'))
+        respondidas = 0
+        try:
+            ftp.sock.sendall(ordenes)
+            for ruta in enviadas:
+                try:
+                    respuesta = ftp.getresp()
+                    if respuesta[:3] not in ('250', '200'):
+                        raise ftplib.error_reply(respuesta)
+                    resultados.append((ruta, None))
+                except (ftplib.error_reply, ftplib.error_temp, ftplib.error_perm) as e:
+                    resultados.append((ruta, e))
+                respondidas += 1
+        except Exception as e:
+            ftp.close()
+            error = IOError("se perdió la conexión FTP: {!r}".format(e))
+            resultados.extend((ruta, error) for ruta in enviadas[respondidas:])
+            resultados.extend((ruta, error) for ruta in rutas[inicio + ventana:])
+            break
+    
+    return resultados
+
 def eliminar_archivos_ftp(conexion):
     """
     Elimina archivos remotos vía FTP más antiguos que los días especificados.
@@ -584,64 +1139,166 @@ def eliminar_archivos_ftp(conexion):
     """
     archivos_eliminados_totales = 0
     archivos_con_error_totales = 0
+    # Referencia común para el umbral de antigüedad de todas las rutas
+    ahora = time.time()
+    
+    ventana = conexion.get('max_peticiones_ftp', VENTANA_FTP)
+    if not isinstance(ventana, int) or isinstance(ventana, bool) or ventana < 1:
+        logging.warning("Valor no válido para max_peticiones_ftp en {}: {!r}. Se usará {}".format(
+            conexion['alias'], ventana, VENTANA_FTP))
+        ventana = VENTANA_FTP
 
     try:
         logging.info("Conectando FTP a {}:{} (alias: {})".format(
             conexion['host'], conexion.get('puerto', 21), conexion['alias']))
         ftp = ftplib.FTP()
-        ftp.connect(conexion['host'], conexion.get('puerto', 21), timeout=30)
-        ftp.login(conexion['usuario'], conexion['contrasena'])
         
-        # Usar listas para simular "nonlocal" en Python 2
-        contadores = [archivos_eliminados_totales, archivos_con_error_totales]
+        def conectar_ftp():
+            """
+            Función interna que (re)abre la conexión de control sobre el mismo objeto.
+            """
+            ftp.connect(conexion['host'], conexion.get('puerto', 21), timeout=30)
+            ftp.login(conexion['usuario'], conexion['contrasena'])
+            # Sólo se usan el tipo y la fecha de MLSD: pedirlos una vez por conexión
+            # acorta cada línea del listado. Si el servidor no lo admite o responde
+            # con un código inesperado (p. ej. 202 o 4xx), se ignora
+            try:
+                ftp.sendcmd('OPTS MLST type;modify;')
+            except (ftplib.error_perm, ftplib.error_temp, ftplib.error_reply):
+                pass
+        
+        conectar_ftp()
+        
+        # "mlsd" se desactiva al primer rechazo del comando para no repetirlo en
+        # cada directorio; "ruta" es la ruta en curso, para volver a ella si hay
+        # que reconectar. Python 2 no tiene "nonlocal": las funciones internas
+        # actualizan el diccionario
+        opciones_ftp = {'mlsd': True, 'ruta': None}
+        
+        def listar_directorio_ftp(path):
+            """
+            Lista un directorio FTP como tuplas (nombre, es_directorio, mtime).
+            
+            Con MLSD la fecha llega en el propio listado; si el servidor no lo
+            soporta se usa LIST y mtime queda en None para pedirla con MDTM.
+            """
+            if opciones_ftp['mlsd']:
+                try:
+                    return listar_directorio_mlsd(ftp, path)
+                except ftplib.error_perm as e:
+                    if str(e)[:3] not in ('500', '501', '502', '504'):
+                        raise
+                    logging.info("Servidor FTP sin soporte MLSD, se usará LIST + MDTM: {}".format(e))
+                    opciones_ftp['mlsd'] = False
+            
+            lineas = []
+            ftp.retrlines('LIST {}'.format(path), lineas.append)
+            
+            entradas = []
+            for linea in lineas:
+                # Línea estilo Unix: permisos, 7 campos (enlaces, dueño, grupo, tamaño
+                # y fecha en tres partes) y el nombre, que queda entero aunque tenga
+                # espacios. La cabecera "total N" tiene menos campos y se descarta
+                partes = linea.split(None, 8)
+                if len(partes) == 9:
+                    entradas.append((partes[8], partes[0][0] == 'd', None))
+            return entradas
         
-        def procesar_directorio_ftp(path, dias, mascara=None):
+        def reabrir_ftp(path):
+            """
+            Función interna que reabre la conexión si quedó cerrada tras un
+            error que dejó respuestas sin leer, y vuelve a la ruta en curso.
+            
+            Returns:
+                bool: False si estaba cerrada y no se pudo reabrir
+            """
+            if ftp.sock is not None:
+                return True
+            try:
+                conectar_ftp()
+                ftp.cwd(opciones_ftp['ruta'])
+                logging.info("  Reabierta la conexión FTP a {} tras un error".format(conexion['host']))
+                return True
+            except ftplib.all_errors as e:
+                ftp.close()
+                logging.error("ERROR en directorio {} (FTP): no se pudo reabrir la conexión: {}".format(path, e))
+                return False
+        
+        def procesar_directorio_ftp(path, limite_tiempo, mascara=None):
             """
             Función interna para procesar recursivamente un directorio FTP.
+            
+            Se eliminan los archivos modificados antes de limite_tiempo.
+            
+            Returns:
+                tuple: (eliminados, errores) del directorio y sus subdirectorios
             """
-            limite_tiempo = time.time() - (dias * 86400)
+            eliminados = 0
+            errores = 0
+            caducados = []
+            
+            if not reabrir_ftp(path):
+                return 0, 1
             
             try:
-                archivos = []
-                ftp.retrlines('LIST {}'.format(path), archivos.append)
-                
-                for linea in archivos:
-                    partes = linea.split()
-                    if len(partes) < 9:
-                        continue
-                    
-                    nombre = ' '.join(partes[8:])
+                for nombre, es_directorio, mtime in listar_directorio_ftp(path):
                     if nombre in ['.', '..']:
                         continue
                     
-                    ruta_completa = "{}/{}".format(path, nombre) if path else nombre
+                    # Un subdirectorio o un MDTM fallido pueden haber cerrado la
+                    # conexión: sin reabrirla, el resto del directorio fallaría.
+                    # Los caducados ya reunidos no se pueden eliminar
+                    if not reabrir_ftp(path):
+                        return eliminados, errores + 1 + len(caducados)
                     
-                    if linea.startswith('d'):
-                        procesar_directorio_ftp(ruta_completa, dias, mascara)
+                    ruta_completa = path + "/" + nombre if path else nombre
+                    
+                    if es_directorio:
+                        eliminados_sub, errores_sub = procesar_directorio_ftp(ruta_completa, limite_tiempo, mascara)
+                        eliminados += eliminados_sub
+                        errores += errores_sub
                     else:
                         if mascara:
                             if not fnmatch.fnmatch(nombre, mascara):
                                 continue
                                 
                         try:
-                            resp = ftp.sendcmd("MDTM {}".format(ruta_completa))
-                            if resp.startswith('213'):
-                                mtime_str = resp[4:].strip()
-                                mtime = time.mktime(time.strptime(mtime_str, '%Y%m%d%H%M%S'))
-                                
-                                if mtime < limite_tiempo:
-                                    ftp.delete(ruta_completa)
-                                    contadores[0] += 1
-                                    logging.info("ELIMINADO (FTP): {}".format(ruta_completa))
+                            if mtime is None:
+                                resp = ftp.sendcmd("MDTM " + ruta_completa)
+                                if not resp.startswith('213'):
+                                    continue
+                                mtime = convertir_fecha_ftp(resp[4:].strip())
+                            
+                            if mtime < limite_tiempo:
+                                caducados.append(ruta_completa)
                         except ftplib.error_perm as e:
-                            logging.warning("No se pudo obtener fecha de {} (FTP): {}".format(ruta_completa, e))
+                            logging.warning("No se pudo obtener fecha de %s (FTP): %s", ruta_completa, e)
                         except Exception as e:
-                            contadores[1] += 1
-                            logging.error("ERROR procesando {} (FTP): {}".format(ruta_completa, str(e)))
+                            errores += 1
+                            logging.error("ERROR procesando %s (FTP): %s", ruta_completa, e)
+                            if not isinstance(e, (ftplib.error_reply, ftplib.error_temp)):
+                                ftp.close()
+                
+                if caducados and not reabrir_ftp(path):
+                    return eliminados, errores + len(caducados)
+                
+                for ruta_completa, error in eliminar_lote_ftp(ftp, caducados, ventana):
+                    if error is None:
+                        eliminados += 1
+                        logging.info("ELIMINADO (FTP): %s", ruta_completa)
+                    else:
+                        errores += 1
+                        logging.error("ERROR procesando %s (FTP): %s", ruta_completa, error)
                             
             except Exception as e:
-                contadores[1] += 1
+                errores += 1
                 logging.error("ERROR en directorio {} (FTP): {}".format(path, str(e)))
+                # Salvo un rechazo del servidor, el error puede dejar respuestas
+                # sin leer: la conexión se cierra para no interpretarlas después
+                if not isinstance(e, (ftplib.error_reply, ftplib.error_temp, ftplib.error_perm)):
+                    ftp.close()
+            
+            return eliminados, errores
         
         for ruta_config in conexion['rutas']:
             ruta = ruta_config['ruta']
@@ -654,14 +1311,14 @@ def eliminar_archivos_ftp(conexion):
                 logging.info("  Procesando ruta FTP: {} - {} días".format(ruta, dias))
             
             try:
+                # Cerrada tras un error en la ruta anterior
+                if ftp.sock is None:
+                    conectar_ftp()
                 ftp.cwd(ruta)
-                archivos_antes = contadores[0]
-                errores_antes = contadores[1]
-                
-                procesar_directorio_ftp('', dias, mascara)
-                
-                eliminados_ruta = contadores[0] - archivos_antes
-                errores_ruta = contadores[1] - errores_antes
+                opciones_ftp['ruta'] = ruta
+                eliminados_ruta, errores_ruta = procesar_directorio_ftp('', ahora - dias * 86400, mascara)
+                archivos_eliminados_totales += eliminados_ruta
+                archivos_con_error_totales += errores_ruta
                 
                 if mascara:
                     logging.info("  Resumen ruta {} (máscara: '{}'): {} eliminados, {} errores".format(
@@ -672,12 +1329,10 @@ def eliminar_archivos_ftp(conexion):
                 
             except Exception as e:
                 logging.error("La ruta no existe o no es accesible: {} - Error: {}".format(ruta, e))
-                contadores[1] += 1
-        
-        archivos_eliminados_totales = contadores[0]
-        archivos_con_error_totales = contadores[1]
+                archivos_con_error_totales += 1
         
-        ftp.quit()
+        if ftp.sock is not None:
+            ftp.quit()
         
     except ftplib.all_errors as e:
         logging.error("ERROR FTP: {}".format(str(e)))
@@ -767,6 +1422,8 @@ def eliminar_archivos_antiguos(config_file, credenciales_file=None):
         
         # Combinar configuración con credenciales
         conexiones = combinar_configuracion(config, credenciales)
+        # Dos alias que apuntan a la misma ruta del mismo servidor la recorrerían dos veces
+        conexiones = descartar_rutas_duplicadas(conexiones)
         
         if not conexiones:
             logging.error("No hay conexiones válidas para procesar")
@@ -790,14 +1447,51 @@ def eliminar_archivos_antiguos(config_file, credenciales_file=None):
         archivos_con_error_totales = 0
         tiempo_inicio_total = time.time()
         
+        max_paralelas = config.get('max_conexiones_paralelas', MAX_CONEXIONES_PARALELAS)
+        if not isinstance(max_paralelas, int) or isinstance(max_paralelas, bool) or max_paralelas < 1:
+            logging.warning("Valor no válido para max_conexiones_paralelas: {!r}. Se usará {}".format(
+                max_paralelas, MAX_CONEXIONES_PARALELAS))
+            max_paralelas = MAX_CONEXIONES_PARALELAS
+        
+        # Las conexiones son independientes: varios hilos las toman de una cola
+        # común para solapar las esperas de red de distintos servidores
+        # (concurrent.futures no existe en Python 2)
+        pendientes = queue.Queue()
         for alias, conexion in conexiones.items():
-            tiempo_inicio = time.time()
-            
-            eliminados, errores = procesar_conexion(alias, conexion)
+            pendientes.put((alias, conexion))
+        resultados = queue.Queue()
+        
+        def trabajador():
+            while True:
+                try:
+                    alias, conexion = pendientes.get_nowait()
+                except queue.Empty:
+                    return
+                
+                tiempo_inicio = time.time()
+                try:
+                    eliminados, errores = procesar_conexion(alias, conexion)
+                except Exception as e:
+                    logging.error("ERROR procesando conexión {}: {}".format(alias, str(e)))
+                    eliminados, errores = 0, len(conexion.get('rutas', []))
+                resultados.put((alias, eliminados, errores, time.time() - tiempo_inicio))
+        
+        for _ in range(min(max_paralelas, len(conexiones))):
+            hilo = threading.Thread(target=trabajador)
+            hilo.daemon = True
+            hilo.start()
+        
+        completadas = 0
+        while completadas < len(conexiones):
+            try:
+                # Con timeout: en Python 2 un get() bloqueante no atiende Ctrl+C
+                alias, eliminados, errores, tiempo_procesamiento = resultados.get(True, 1)
+            except queue.Empty:
+                continue
+            completadas += 1
             archivos_eliminados_totales += eliminados
             archivos_con_error_totales += errores
             
-            tiempo_procesamiento = time.time() - tiempo_inicio
             logging.info("Resumen conexión {}: {} eliminados, {} errores - Tiempo: {:.2f}s".format(
                 alias, eliminados, errores, tiempo_procesamiento))
         